@@ -0,0 +1,95 @@
+"""
+Compare output encoding profiles on one video.
+
+Usage:
+    python benchmarks/bench_output_profiles.py path/to/video.mp4 [--ffmpeg_path ffmpeg]
+
+For each profile the video is extracted into a temporary directory and the
+CPU time FFmpeg spent (its own ``-benchmark`` user time, and the user + system
+time of the child process) and the average bytes per frame are reported. CPU
+time, unlike wall time, is not skewed by disk caches or other load.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import Config, FrameExtractor  # noqa: E402
+
+PROFILES = [
+    ("png", 0),
+    ("png", 1),
+    ("png", 3),
+    ("png", 9),
+    ("jpg", None),
+    ("webp", 0),
+    ("webp", 4),
+    ("raw", None),
+]
+
+
+def run_profile(video, ffmpeg_path, output_format, level, workdir):
+    cfg = Config(
+        input_path=video,
+        output_root=workdir,
+        ffmpeg_path=ffmpeg_path,
+        output_format=output_format,
+        compression_level=level,
+        overwrite=True,
+        maintain_structure=False,
+        log_file=None,
+        metadata_csv=None,
+        quarantine_csv=None,
+        # Profiling runs FFmpeg with -benchmark and records its resource usage
+        profile_dir=workdir / "profile",
+    )
+    extractor = FrameExtractor(cfg)
+    extractor.process_video(video)
+    runs = [
+        run
+        for video_report in extractor.profiler.report()["slowest_videos"]
+        for run in video_report["ffmpeg_runs"]
+    ]
+    extractor.finish_run()
+    ffmpeg_utime = sum(run.get("ffmpeg_utime", 0.0) for run in runs)
+    child_cpu = sum(
+        run.get("cpu_user", 0.0) + run.get("cpu_system", 0.0) for run in runs
+    )
+
+    row = extractor.log_df.iloc[-1]
+    frames = int(row["frame_count"])
+    total_bytes = sum(
+        f.stat().st_size for f in Path(row["output_dir"]).iterdir() if f.is_file()
+    )
+    return ffmpeg_utime, child_cpu, frames, total_bytes / frames if frames else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--ffmpeg_path", type=Path, default=Path("ffmpeg"))
+    args = parser.parse_args()
+
+    print(
+        f"{'profile':<12}{'level':>6}{'frames':>8}{'utime':>10}{'cpu':>10}"
+        f"{'bytes/frame':>14}"
+    )
+    for output_format, level in PROFILES:
+        with tempfile.TemporaryDirectory() as workdir:
+            utime, cpu, frames, per_frame = run_profile(
+                args.video, args.ffmpeg_path, output_format, level, Path(workdir)
+            )
+        level_str = "-" if level is None else str(level)
+        print(
+            f"{output_format:<12}{level_str:>6}{frames:>8}{utime:>10.3f}{cpu:>10.3f}"
+            f"{per_frame:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -24,4 +24,44 @@ DEFAULT_FRAME_PATTERN = "frame_%04d.png"
 # Processing settings
 DEFAULT_THREADS = 4
 DEFAULT_OVERWRITE = False
+DEFAULT_SKIP_EXISTING = False  # Earlier versions always re-extracted
 DEFAULT_MAINTAIN_STRUCTURE = True
+
+# Distributed extraction (shared-filesystem work queue)
+DEFAULT_QUEUE_DIR = None  # e.g. Path("/mnt/shared/frame_queue"); None disables
+DEFAULT_LEASE_TIMEOUT = 300.0  # Seconds without heartbeat before a claim is reclaimed
+DEFAULT_HEARTBEAT_INTERVAL = 30.0  # Seconds between lease refreshes
+DEFAULT_QUEUE_POLL_INTERVAL = 10.0  # Seconds between checks for work held by others
+
+# Frame sampling
+DEFAULT_SAMPLING_MODE = "iframe"  # iframe, fps, scene or timestamps
+DEFAULT_SAMPLE_FPS = 1.0  # Frames per second for the "fps" mode
+DEFAULT_SCENE_THRESHOLD = 0.3  # Scene-change score (0-1) for the "scene" mode
+
+# Output encoding (see lib/output_formats.py for the available profiles)
+DEFAULT_COMPRESSION_LEVEL = None  # None: PNG level 3, WebP level 4
+DEFAULT_FSYNC_POLICY = "none"  # none, video or run
+
+# Deduplication of identical input videos
+DEFAULT_DEDUP_STORE = None  # e.g. Path("frame_store"); None disables
+
+# FFmpeg supervision
+DEFAULT_FFMPEG_TIMEOUT_FACTOR = 2.0  # Deadline as a multiple of the video duration
+DEFAULT_FFMPEG_MIN_TIMEOUT = 120.0  # Seconds; floor for short videos
+DEFAULT_FFMPEG_STALL_TIMEOUT = 60.0  # Seconds without progress before killing FFmpeg
+DEFAULT_MAX_RETRIES = 2  # Retries with fallback flags after a failure or timeout
+DEFAULT_QUARANTINE_CSV = Path("quarantine.csv")  # Inputs that failed every attempt
+
+# Segmented extraction of long videos
+DEFAULT_SEGMENTS = 1  # Parallel keyframe-aligned segments per video (1 = off)
+DEFAULT_MIN_SEGMENT_DURATION = 60.0  # Seconds; shorter videos are not split
+
+# Frame quality scoring
+DEFAULT_QUALITY_WIDTH = 160  # Frames are scored downscaled to this width (pixels)
+
+# Columnar outputs
+DEFAULT_PARQUET_DIR = None  # e.g. Path("extraction_parquet"); None disables
+
+# Pre-flight probing of inputs
+DEFAULT_PROBE_WORKERS = 8  # Concurrent FFmpeg probes
+DEFAULT_ESTIMATE_SPEED = 20.0  # Assumed multiple of realtime for the up-front estimate
@@ -0,0 +1,268 @@
+"""
+Supervised FFmpeg execution.
+
+FFmpeg's stderr and stdout are drained on background threads so the child can
+never block on a full pipe, and its stdin is closed so it cannot wait on an
+interactive prompt. The parent watches two clocks: an overall deadline scaled
+from the input duration FFmpeg reports in its banner, and a no-progress
+watchdog. Either one kills the process and raises :class:`FFmpegTimeoutError`
+so the caller can retry with fallback flags or give up on the input.
+
+The watchdog does not rely on the ``frame=``/``time=`` counters alone: a
+``select`` or scene filter can decode a long GOP, or minutes of static video,
+without emitting a frame. Where ``/proc`` is available the child counts as
+alive while its CPU time (``/proc/<pid>/stat``) or bytes read
+(``rchar`` in ``/proc/<pid>/io``) keep growing, so only a child that is truly
+stuck, neither computing nor reading, is killed for stalling.
+
+When asked for resource usage, the supervisor reaps the child itself with
+``os.wait4`` to get its CPU time, reads its I/O counters from
+``/proc/<pid>/io`` just before, samples its peak RSS (``VmHWM``, which unlike
+``ru_maxrss`` does not include the forking Python process) while it runs, and
+collects the ``bench:`` lines FFmpeg prints when run with ``-benchmark``.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import io
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+
+DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d\d):(\d\d(?:\.\d+)?)")
+PROGRESS_RE = re.compile(r"frame=\s*(\d+).*?time=\s*(\S+)")
+BENCH_RE = re.compile(r"(\w+)=([\d.]+)")
+
+# Retry ladder: plain run, then tolerate corrupt data, then also decode single-threaded
+FALLBACK_INPUT_ARGS = [
+    [],
+    ["-err_detect", "ignore_err", "-fflags", "+discardcorrupt+genpts"],
+    [
+        "-err_detect",
+        "ignore_err",
+        "-fflags",
+        "+discardcorrupt+genpts",
+        "-threads",
+        "1",
+    ],
+]
+
+
+class FFmpegTimeoutError(subprocess.SubprocessError):
+    """FFmpeg was killed for exceeding its deadline or making no progress."""
+
+    def __init__(self, cmd, reason, elapsed):
+        super().__init__(f"{reason} after {elapsed:.0f}s")
+        self.cmd = cmd
+        self.reason = reason
+        self.elapsed = elapsed
+
+
+def parse_duration(line):
+    match = DURATION_RE.search(line)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+class FFmpegSupervisor:
+    def __init__(
+        self, timeout_factor=2.0, min_timeout=120.0, stall_timeout=60.0, nice=0
+    ):
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.stall_timeout = stall_timeout
+        # Scheduling priority increment for the children (POSIX only)
+        self.nice = nice
+
+    def run(
+        self,
+        cmd,
+        on_line,
+        on_stdout=None,
+        expected_duration=None,
+        poll_interval=0.5,
+        usage=None,
+    ):
+        """Run ``cmd`` feeding each stderr line to ``on_line``; returns the exit code.
+
+        ``on_stdout`` receives binary stdout chunks; without it stdout is discarded.
+        ``expected_duration`` (seconds of media to process) overrides the duration
+        in FFmpeg's banner, e.g. when only a window of the input is decoded.
+        A ``usage`` dict is filled with the child's resource usage.
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE if on_stdout else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        if self.nice:
+            self._lower_priority(process.pid)
+        lines = queue.Queue()
+        readers = [
+            threading.Thread(
+                target=self._read_lines, args=(process.stderr, lines), daemon=True
+            )
+        ]
+        if on_stdout:
+            readers.append(
+                threading.Thread(
+                    target=self._read_chunks,
+                    args=(process.stdout, on_stdout),
+                    daemon=True,
+                )
+            )
+        for reader in readers:
+            reader.start()
+
+        started = last_progress = time.monotonic()
+        deadline = None
+        if expected_duration:
+            deadline = started + self._timeout_for(expected_duration)
+        last_counters = last_activity = None
+        last_sample = last_activity_check = 0.0
+
+        try:
+            while True:
+                try:
+                    line = lines.get(timeout=poll_interval)
+                except queue.Empty:
+                    line = ""
+                now = time.monotonic()
+                if usage is not None and now - last_sample >= poll_interval:
+                    self._sample_memory(process.pid, usage)
+                    last_sample = now
+                if now - last_activity_check >= poll_interval:
+                    activity = self._read_activity(process.pid)
+                    if activity is not None and activity != last_activity:
+                        if last_activity is not None:
+                            last_progress = now
+                        last_activity = activity
+                    last_activity_check = now
+
+                if line is None:
+                    break
+                if line:
+                    if usage is not None and line.startswith("bench:"):
+                        for key, value in BENCH_RE.findall(line):
+                            # FFmpeg's maxrss includes the Python parent it forked from
+                            if key != "maxrss":
+                                usage[f"ffmpeg_{key}"] = float(value)
+                    progress = PROGRESS_RE.search(line)
+                    if progress:
+                        if progress.groups() != last_counters:
+                            last_counters = progress.groups()
+                            last_progress = now
+                    else:
+                        last_progress = now
+                        if deadline is None:
+                            duration = parse_duration(line)
+                            if duration:
+                                deadline = started + self._timeout_for(duration)
+                    on_line(line)
+
+                if deadline is not None and now > deadline:
+                    self._kill(process)
+                    raise FFmpegTimeoutError(cmd, "Timed out", now - started)
+                if self.stall_timeout and now - last_progress > self.stall_timeout:
+                    self._kill(process)
+                    raise FFmpegTimeoutError(cmd, "No progress", now - started)
+
+            if usage is not None and hasattr(os, "wait4"):
+                self._reap(process, usage)
+            else:
+                process.wait()
+            for reader in readers:
+                reader.join()
+            return process.returncode
+        except BaseException:
+            self._kill(process)
+            raise
+
+    def _timeout_for(self, duration):
+        return max(self.min_timeout, duration * self.timeout_factor)
+
+    @staticmethod
+    def _kill(process):
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+    @staticmethod
+    def _reap(process, usage):
+        # The exited child stays readable in /proc until it is reaped
+        try:
+            with open(f"/proc/{process.pid}/io") as f:
+                for line in f:
+                    key, value = line.split(":")
+                    if key in ("rchar", "wchar", "read_bytes", "write_bytes"):
+                        usage[f"io_{key}"] = int(value)
+        except OSError:
+            pass
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        usage["cpu_user"] = rusage.ru_utime
+        usage["cpu_system"] = rusage.ru_stime
+
+    def _lower_priority(self, pid):
+        # Set from the parent: a preexec_fn is unsafe in a multi-threaded process
+        if not hasattr(os, "setpriority"):
+            return
+        try:
+            niceness = os.getpriority(os.PRIO_PROCESS, 0) + self.nice
+            os.setpriority(os.PRIO_PROCESS, pid, niceness)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_activity(pid):
+        """``(cpu_ticks, rchar)`` of a running child, or None without ``/proc``."""
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # Fields after the parenthesised command name, which may hold spaces
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu_ticks = int(fields[11]) + int(fields[12])
+        except (OSError, ValueError, IndexError):
+            return None
+        rchar = None
+        try:
+            with open(f"/proc/{pid}/io") as f:
+                for line in f:
+                    if line.startswith("rchar:"):
+                        rchar = int(line.split(":")[1])
+                        break
+        except (OSError, ValueError):
+            pass
+        return cpu_ticks, rchar
+
+    @staticmethod
+    def _sample_memory(pid, usage):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peak = int(line.split()[1])
+                        usage["max_rss_kb"] = max(usage.get("max_rss_kb", 0), peak)
+                        return
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _read_lines(stream, lines):
+        # Universal newlines split FFmpeg's carriage-return progress updates
+        for line in io.TextIOWrapper(stream, errors="replace"):
+            lines.put(line)
+        lines.put(None)
+
+    @staticmethod
+    def _read_chunks(stream, on_stdout, chunk_size=1 << 20):
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            on_stdout(chunk)
@@ -0,0 +1,191 @@
+"""
+Frame quality scoring.
+
+Extracted frames are reduced to small grayscale arrays and scored in batches
+with NumPy, so a whole batch is one vectorized pass per metric:
+
+* ``sharpness``: variance of the 4-neighbour Laplacian; motion blur and
+  defocus flatten edges and drive it towards zero.
+* ``brightness``: mean luminance (0-255).
+* ``clipped``: fraction of pixels crushed to black or blown out to white.
+* ``motion``: mean absolute difference to the previous frame (0-255); near
+  zero for frames that repeat their predecessor.
+
+For image outputs the extraction run itself splits the selected frames into
+a second output, scaled down and converted to gray, which is piped to the
+scorer, so no image is decoded again; segmented runs decode their images back
+with one FFmpeg process instead. ``raw`` output is read directly from its
+memory map. Batches are scored on a thread pool while the next one is being
+read.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+QUALITY_METRICS = ("sharpness", "brightness", "clipped", "motion")
+# Luminance at or beyond these levels counts as clipped
+CLIP_LOW = 4
+CLIP_HIGH = 251
+# ITU-R BT.601 luma weights, as FFmpeg uses for RGB to gray
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def score_batch(frames, previous=None):
+    """Score ``(N, H, W)`` gray frames; ``previous`` is the frame before the batch."""
+    frames = frames.astype(np.float32)
+    laplacian = (
+        frames[:, :-2, 1:-1]
+        + frames[:, 2:, 1:-1]
+        + frames[:, 1:-1, :-2]
+        + frames[:, 1:-1, 2:]
+        - 4 * frames[:, 1:-1, 1:-1]
+    )
+    clipped = (frames <= CLIP_LOW) | (frames >= CLIP_HIGH)
+
+    if previous is None:
+        before = np.concatenate([frames[:1], frames[:-1]])
+    else:
+        before = np.concatenate([previous[None].astype(np.float32), frames[:-1]])
+    motion = np.abs(frames - before).mean(axis=(1, 2))
+    if previous is None:
+        # The first frame of a video has nothing to differ from
+        motion[0] = np.nan
+
+    return {
+        "sharpness": laplacian.var(axis=(1, 2)),
+        "brightness": frames.mean(axis=(1, 2)),
+        "clipped": clipped.mean(axis=(1, 2)),
+        "motion": motion,
+    }
+
+
+def rgb_to_small_gray(frames, width):
+    """Reduce ``(N, H, W, 3)`` RGB frames to gray, box-downscaled to about ``width``."""
+    factor = max(1, frames.shape[2] // width)
+    height = frames.shape[1] // factor * factor
+    cropped = frames[:, :height, : frames.shape[2] // factor * factor]
+    gray = cropped.astype(np.float32) @ LUMA_WEIGHTS
+    n, h, w = gray.shape
+    return gray.reshape(n, h // factor, factor, w // factor, factor).mean(axis=(2, 4))
+
+
+def scaled_size(width, height, target_width):
+    """Even-sized ``(width, height)`` no wider than ``target_width``, same aspect."""
+    if width <= target_width:
+        return width, height
+    scaled_height = max(2, round(target_width * height / width / 2) * 2)
+    return target_width, scaled_height
+
+
+def summarize(scores, keep=None):
+    """Per-video aggregates for the metadata CSV."""
+    summary = {}
+    for metric in QUALITY_METRICS:
+        values = scores[metric]
+        finite = values[np.isfinite(values)]
+        summary[f"quality_{metric}_mean"] = (
+            round(float(finite.mean()), 4) if finite.size else None
+        )
+    summary["quality_sharpness_min"] = (
+        round(float(scores["sharpness"].min()), 4) if len(scores["sharpness"]) else None
+    )
+    if keep is not None:
+        summary["quality_rejected"] = int((~keep).sum())
+    return summary
+
+
+def passes_thresholds(scores, thresholds):
+    """Boolean mask of frames meeting every configured ``(metric, op, limit)``."""
+    keep = np.ones(len(scores["sharpness"]), dtype=bool)
+    for metric, op, limit in thresholds:
+        values = scores[metric]
+        # NaN (no previous frame for motion) never rejects a frame
+        if op == "min":
+            keep &= ~(values < limit)
+        else:
+            keep &= ~(values > limit)
+    return keep
+
+
+class FrameScorer:
+    """Scores streams of frames in batches on a shared worker pool."""
+
+    def __init__(self, workers=None, batch_size=32):
+        self.batch_size = batch_size
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="frame-quality"
+        )
+
+    def _submit(self, futures, batch, previous):
+        futures.append(self._pool.submit(score_batch, batch, previous))
+
+    @staticmethod
+    def _collect(futures):
+        results = [future.result() for future in futures]
+        if not results:
+            return {metric: np.empty(0, dtype=np.float32) for metric in QUALITY_METRICS}
+        return {
+            metric: np.concatenate([r[metric] for r in results])
+            for metric in QUALITY_METRICS
+        }
+
+    def score_array(self, frames, width):
+        """Score an ``(N, H, W, 3)`` RGB array (e.g. a memory-mapped raw output)."""
+        futures = []
+        previous = None
+        for start in range(0, len(frames), self.batch_size):
+            batch = rgb_to_small_gray(frames[start : start + self.batch_size], width)
+            self._submit(futures, batch, previous)
+            previous = batch[-1]
+        return self._collect(futures)
+
+    def gray_stream(self, frame_size):
+        """Return ``(on_bytes, finish)`` for scoring a stream of raw gray frames.
+
+        ``frame_size`` returns ``(width, height)``, or None while the size is
+        not known yet (FFmpeg describes its outputs on stderr while the frames
+        arrive on stdout); bytes are buffered until it is. ``on_bytes``
+        accepts chunks in any size and ``finish`` returns the scores once the
+        stream has ended.
+        """
+        buffer = bytearray()
+        futures = []
+        previous = None
+
+        def flush(data, width, height):
+            nonlocal previous
+            batch = np.frombuffer(bytes(data), dtype=np.uint8).reshape(
+                -1, height, width
+            )
+            self._submit(futures, batch, previous)
+            previous = batch[-1]
+
+        def on_bytes(chunk):
+            buffer.extend(chunk)
+            size = frame_size()
+            if size is None:
+                return
+            batch_bytes = size[0] * size[1] * self.batch_size
+            while len(buffer) >= batch_bytes:
+                flush(buffer[:batch_bytes], *size)
+                del buffer[:batch_bytes]
+
+        def finish():
+            size = frame_size()
+            if size is None:
+                if buffer:
+                    raise RuntimeError("Could not determine scoring frame size")
+                return self._collect(futures)
+            frame_bytes = size[0] * size[1]
+            whole = len(buffer) // frame_bytes * frame_bytes
+            if whole:
+                flush(buffer[:whole], *size)
+            return self._collect(futures)
+
+        return on_bytes, finish
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
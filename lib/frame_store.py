@@ -0,0 +1,137 @@
+"""
+Content-addressed store of extracted frames.
+
+Entries are keyed by a hash of the video bytes combined with the extraction
+parameters, so the same clip found under another path (a copy in the
+``convert_structure`` tree, a re-upload, ...) reuses the frames extracted the
+first time instead of running FFmpeg again. Frames are hard-linked between the
+store and output directories, falling back to copies across filesystems, so a
+duplicate costs neither CPU nor extra disk. The manifest also keeps the
+video's quality summary, so a duplicate gets the same metadata columns.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from config.logger_config import logger
+
+MANIFEST_FILE = "manifest.json"
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def new_content_hasher():
+    return hashlib.blake2b(digest_size=20)
+
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE):
+    """Hex digest of a file's bytes."""
+    hasher = new_content_hasher()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def extraction_key(content_hash, params):
+    """Combine a content hash with the parameters that affect the frames."""
+    payload = json.dumps(
+        {"content": content_hash, "params": params}, sort_keys=True, default=str
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class FrameStore:
+    """Frames keyed by :func:`extraction_key`, laid out as ``<root>/ab/abcdef.../``."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def entry_dir(self, key):
+        return self.root / key[:2] / key
+
+    def lookup(self, key):
+        """Return the manifest of a complete entry, or None."""
+        try:
+            with open(self.entry_dir(key) / MANIFEST_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def link_into(self, key, target_dir, manifest=None):
+        """Materialize an entry's files in ``target_dir``; returns their names."""
+        manifest = manifest or self.lookup(key)
+        entry = self.entry_dir(key)
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for name in manifest["files"]:
+            link_or_copy(entry / name, target_dir / name)
+        return manifest["files"]
+
+    def publish(self, key, source_dir, files, source_video, frame_count, quality=None):
+        """Add the committed output of ``source_video`` to the store."""
+        entry = self.entry_dir(key)
+        if entry.exists():
+            # Scoring does not change the frames, so an unscored entry is kept
+            if quality is not None:
+                self._add_quality(entry, quality)
+            return
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        # Build under a temporary name so a manifest is only visible once complete
+        tmp_dir = entry.parent / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp_dir.mkdir()
+        try:
+            for name in files:
+                link_or_copy(Path(source_dir) / name, tmp_dir / name)
+            manifest = {
+                "key": key,
+                "files": list(files),
+                "frame_count": frame_count,
+                "source": str(source_video),
+                "created": time.time(),
+                "quality": quality,
+            }
+            with open(tmp_dir / MANIFEST_FILE, "w") as f:
+                json.dump(manifest, f)
+            os.rename(tmp_dir, entry)
+        except OSError as e:
+            # Another process published the same key first, or the store is unwritable
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not entry.exists():
+                logger.warning(f"Could not add {source_video} to frame store: {e}")
+
+    @staticmethod
+    def _add_quality(entry, quality):
+        manifest_path = entry / MANIFEST_FILE
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("quality") is not None:
+                return
+            manifest["quality"] = quality
+            tmp_path = manifest_path.with_name(
+                f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp"
+            )
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, manifest_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not add quality scores to {manifest_path}: {e}")
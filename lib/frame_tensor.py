@@ -0,0 +1,253 @@
+"""
+Memory-mappable frame tensor files.
+
+All frames of a video (or of a whole directory run) are stored back to back in
+one file so training code can read any frame with a zero-copy ``np.memmap``
+slice instead of opening and decoding an image file.
+
+Layout (little-endian)::
+
+    [0, 64)                 header: magic, version, dtype, count, H, W, C,
+                            data offset, index offset, index length
+    [4096, index_offset)    frames, ``count * H * W * C`` values of ``dtype``
+    [index_offset, ...)     pts (float64 x count), video number (uint32 x count),
+                            UTF-8 JSON table of videos and their filename metadata
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TENSOR_MAGIC = b"IFRTNSR1"
+TENSOR_VERSION = 1
+TENSOR_FILE = "frames.ifrt"
+DATA_OFFSET = 4096
+_HEADER = struct.Struct("<8sI8sQIIIQQQ")
+
+
+class FrameTensorWriter:
+    """Append raw frames from one or more videos into a tensor file.
+
+    The file is built under a temporary name and renamed into place by
+    ``close()``, so readers never observe a half-written tensor.
+    """
+
+    def __init__(self, path, channels=3, dtype="uint8"):
+        self.path = Path(path)
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.width = None
+        self.height = None
+        self.count = 0
+        self.pts = []
+        self.video_numbers = []
+        self.videos = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp_path, "wb+")
+        self._file.write(b"\0" * DATA_OFFSET)
+        self._video_bytes = 0
+
+    @property
+    def frame_size(self):
+        """``(width, height)`` all frames are scaled to, once the first video is in."""
+        if self.width is None:
+            return None
+        return self.width, self.height
+
+    def write(self, chunk):
+        """Write raw frame bytes of the video currently being added."""
+        self._file.write(chunk)
+        self._video_bytes += len(chunk)
+
+    def end_video(self, video_path, width, height, pts=None, metadata=None):
+        """Close off the bytes written since the last call as one video's frames."""
+        if self.width is None:
+            self.width, self.height = width, height
+        elif (width, height) != (self.width, self.height):
+            raise ValueError(
+                f"Frame size {width}x{height} of {video_path} does not match "
+                f"tensor size {self.width}x{self.height}"
+            )
+
+        frame_bytes = self.width * self.height * self.channels * self.dtype.itemsize
+        frames, remainder = divmod(self._video_bytes, frame_bytes)
+        if remainder:
+            # Drop a truncated trailing frame rather than corrupting the layout
+            self._file.truncate(self._file.tell() - remainder)
+            self._file.seek(0, os.SEEK_END)
+
+        pts = list(pts or [])[:frames]
+        pts += [float("nan")] * (frames - len(pts))
+
+        self.videos.append(
+            {
+                "video_path": str(video_path),
+                "first": self.count,
+                "count": frames,
+                "metadata": metadata or {},
+            }
+        )
+        self.pts.extend(pts)
+        self.video_numbers.extend([len(self.videos) - 1] * frames)
+        self.count += frames
+        self._video_bytes = 0
+        return frames
+
+    def abort_video(self):
+        """Discard bytes written for a video that failed part way."""
+        self._file.truncate(self._file.tell() - self._video_bytes)
+        self._file.seek(0, os.SEEK_END)
+        self._video_bytes = 0
+
+    def discard(self):
+        """Drop the file being built without publishing it."""
+        if not self._file.closed:
+            self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._video_bytes:
+            self.abort_video()
+
+        index_offset = self._file.seek(0, os.SEEK_END)
+        index = (
+            np.asarray(self.pts, dtype="<f8").tobytes()
+            + np.asarray(self.video_numbers, dtype="<u4").tobytes()
+            + json.dumps(self.videos).encode("utf-8")
+        )
+        self._file.write(index)
+
+        self._file.seek(0)
+        self._file.write(
+            _HEADER.pack(
+                TENSOR_MAGIC,
+                TENSOR_VERSION,
+                self.dtype.str.encode("ascii"),
+                self.count,
+                self.height or 0,
+                self.width or 0,
+                self.channels,
+                DATA_OFFSET,
+                index_offset,
+                len(index),
+            )
+        )
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameTensorReader:
+    """Zero-copy random access to the frames of a tensor file.
+
+    ``reader[i]`` and ``reader[a:b]`` return views into a read-only memory map,
+    so a random frame costs a page-cache hit rather than a file open and decode.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            (
+                magic,
+                version,
+                dtype,
+                self.count,
+                self.height,
+                self.width,
+                self.channels,
+                data_offset,
+                index_offset,
+                index_length,
+            ) = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != TENSOR_MAGIC:
+                raise ValueError(f"{self.path} is not a frame tensor file")
+            if version != TENSOR_VERSION:
+                raise ValueError(f"Unsupported tensor file version {version}")
+            f.seek(index_offset + self.count * 12)
+            self.videos = json.loads(f.read(index_length - self.count * 12))
+
+        self.dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+        self.shape = (self.count, self.height, self.width, self.channels)
+        if self.count:
+            self.frames = np.memmap(
+                self.path,
+                dtype=self.dtype,
+                mode="r",
+                offset=data_offset,
+                shape=self.shape,
+            )
+            self.pts = np.memmap(
+                self.path,
+                dtype="<f8",
+                mode="r",
+                offset=index_offset,
+                shape=(self.count,),
+            )
+            self.video_numbers = np.memmap(
+                self.path,
+                dtype="<u4",
+                mode="r",
+                offset=index_offset + self.count * 8,
+                shape=(self.count,),
+            )
+        else:
+            self.frames = np.empty(self.shape, dtype=self.dtype)
+            self.pts = np.empty(0, dtype="<f8")
+            self.video_numbers = np.empty(0, dtype="<u4")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def video_of(self, index):
+        """The video entry (path, frame range, filename metadata) frame ``index`` came from."""
+        return self.videos[int(self.video_numbers[index])]
+
+    def metadata(self, index):
+        """Filename metadata of frame ``index`` joined with its source path and PTS."""
+        video = self.video_of(index)
+        return {
+            "video_path": video["video_path"],
+            "pts": float(self.pts[index]),
+            **video["metadata"],
+        }
+
+    def video_frames(self, video_path):
+        """All frames of one source video as a memory-mapped view."""
+        for video in self.videos:
+            if video["video_path"] == str(video_path):
+                return self.frames[video["first"] : video["first"] + video["count"]]
+        raise KeyError(video_path)
+
+    def frame_table(self):
+        """One row per frame with its PTS, source video and filename metadata."""
+        videos = pd.DataFrame(
+            [{"video_path": v["video_path"], **v["metadata"]} for v in self.videos]
+        )
+        frames = pd.DataFrame(
+            {
+                "frame": np.arange(self.count),
+                "pts": self.pts,
+                "video": self.video_numbers.astype(np.int64),
+            }
+        )
+        if videos.empty:
+            return frames
+        return frames.join(videos, on="video").drop(columns="video")
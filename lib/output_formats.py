@@ -0,0 +1,128 @@
+"""
+Output encoding profiles for extracted frames.
+
+Each profile knows its file extension and the FFmpeg encoder arguments that
+actually control it: PNG ignores ``-q:v`` and is tuned with
+``-compression_level``, JPEG uses ``-q:v`` directly and WebP takes a 0-100
+``-quality``. The ``raw`` profile skips image encoding entirely and streams
+RGB24 frames into a single memory-mappable file per video; ``tensor`` pipes
+them into a ``lib.frame_tensor`` file with a PTS and metadata index.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+RAW_FRAMES_FILE = "frames.raw"
+RAW_HEADER_FILE = "frames.json"
+
+_STREAM_SIZE_RE = re.compile(r"Stream #\d+:\d+.*?: Video: .*?, (\d{2,5})x(\d{2,5})")
+
+
+def _png_args(cfg, level):
+    return ["-c:v", "png", "-compression_level", str(3 if level is None else level)]
+
+
+def _jpeg_args(cfg, level):
+    # mjpeg qscale: 2-31, lower is better; allow 1 as in DEFAULT_QUALITY
+    return ["-c:v", "mjpeg", "-qmin", "1", "-q:v", str(cfg.quality)]
+
+
+def _webp_args(cfg, level):
+    # Map the 1-31 (lower is better) quality scale onto libwebp's 0-100
+    webp_quality = round(100 * (31 - min(max(cfg.quality, 1), 31)) / 30)
+    return [
+        "-c:v",
+        "libwebp",
+        "-quality",
+        str(webp_quality),
+        "-compression_level",
+        str(4 if level is None else level),
+    ]
+
+
+def _raw_args(cfg, level):
+    return ["-pix_fmt", "rgb24", "-f", "rawvideo"]
+
+
+# single_file: FFmpeg writes one file per video; pipe: frames arrive on stdout
+OUTPUT_PROFILES = {
+    "png": {"extension": "png", "codec_args": _png_args, "single_file": False},
+    "jpg": {"extension": "jpg", "codec_args": _jpeg_args, "single_file": False},
+    "webp": {"extension": "webp", "codec_args": _webp_args, "single_file": False},
+    "raw": {"extension": "raw", "codec_args": _raw_args, "single_file": True},
+    "tensor": {
+        "extension": "ifrt",
+        "codec_args": _raw_args,
+        "single_file": True,
+        "pipe": True,
+    },
+}
+OUTPUT_PROFILES["jpeg"] = OUTPUT_PROFILES["jpg"]
+
+
+def get_output_profile(output_format):
+    try:
+        return OUTPUT_PROFILES[output_format.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported output format '{output_format}'. "
+            f"Available: {', '.join(OUTPUT_PROFILES)}"
+        ) from None
+
+
+def frame_glob(output_format):
+    """Glob matching the frame files written for ``output_format``."""
+    return f"*.{get_output_profile(output_format)['extension']}"
+
+
+def resolve_frame_pattern(frame_pattern, output_format):
+    """Make the frame pattern's extension follow the selected output format."""
+    extension = get_output_profile(output_format)["extension"]
+    return f"{Path(frame_pattern).with_suffix('')}.{extension}"
+
+
+def parse_output_size(ffmpeg_stderr_lines, output=0):
+    """Return ``(width, height)`` of the video stream FFmpeg reported for an output."""
+    in_output = False
+    for line in ffmpeg_stderr_lines:
+        if line.startswith("Output #"):
+            in_output = line.startswith(f"Output #{output},")
+        elif in_output:
+            match = _STREAM_SIZE_RE.search(line)
+            if match:
+                return int(match.group(1)), int(match.group(2))
+    return None
+
+
+def write_raw_header(output_dir, width, height, channels=3, dtype="uint8"):
+    """Describe ``frames.raw`` so it can be memory-mapped later; returns the frame count."""
+    raw_path = Path(output_dir) / RAW_FRAMES_FILE
+    frame_bytes = width * height * channels * np.dtype(dtype).itemsize
+    count = raw_path.stat().st_size // frame_bytes
+    header = {
+        "count": count,
+        "height": height,
+        "width": width,
+        "channels": channels,
+        "dtype": dtype,
+    }
+    with open(Path(output_dir) / RAW_HEADER_FILE, "w") as f:
+        json.dump(header, f)
+    return count
+
+
+def load_raw_frames(output_dir):
+    """Memory-map the frames of a ``raw`` output directory as ``(N, H, W, C)``."""
+    with open(Path(output_dir) / RAW_HEADER_FILE) as f:
+        header = json.load(f)
+    return np.memmap(
+        Path(output_dir) / RAW_FRAMES_FILE,
+        dtype=header["dtype"],
+        mode="r",
+        shape=(header["count"], header["height"], header["width"], header["channels"]),
+    )
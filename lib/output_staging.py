@@ -0,0 +1,150 @@
+"""
+Staged output directories with atomic commit.
+
+FFmpeg writes a video's frames into a hidden sibling staging directory. When
+extraction succeeds the staging directory is renamed over the final one, so
+readers only ever see complete frame sets, and a previous output is replaced
+by moving it aside in one rename instead of unlinking it file by file. The old
+directory is then deleted on a background thread, off the extraction path.
+
+In distributed mode the staging directory also carries the node id. A node
+that lost its claim can still have FFmpeg running, and image2 opens every
+frame by path, so a shared name would let it write into the new owner's
+directory. The new owner moves the other nodes' staging directories aside
+instead, and the stale FFmpeg then fails on its next frame.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config.logger_config import logger
+
+FSYNC_POLICIES = ("none", "video", "run")
+
+# Single worker: old outputs are removed one at a time, in the background
+_cleanup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-cleanup")
+
+
+def staging_dir_for(output_dir, owner=None):
+    output_dir = Path(output_dir)
+    if owner is None:
+        return output_dir.parent / f".{output_dir.name}.staging"
+    owner = re.sub(r"[^\w.-]", "_", str(owner))
+    return output_dir.parent / f".{output_dir.name}.staging-{owner}"
+
+
+def _move_aside(path):
+    leftover = path.with_name(f"{path.name}.{uuid.uuid4().hex}.old")
+    os.rename(path, leftover)
+    _discard(leftover)
+
+
+def _discard(path):
+    """Remove a directory tree on the cleanup thread."""
+
+    def remove():
+        try:
+            shutil.rmtree(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove old output {path}: {e}")
+
+    _cleanup_pool.submit(remove)
+
+
+def prepare_staging(output_dir, owner=None):
+    """Create an empty staging directory for ``output_dir`` and return it.
+
+    ``owner`` is the node id of a distributed run, which holds the claim on
+    this output; staging directories of other nodes are stale and removed.
+    """
+    output_dir = Path(output_dir)
+    staging_dir = staging_dir_for(output_dir, owner)
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    # Leftovers of an interrupted run: a stale staging dir or an undeleted old output
+    if staging_dir.exists():
+        _move_aside(staging_dir)
+    if owner is not None:
+        for other in output_dir.parent.glob(f".{output_dir.name}.staging-*"):
+            if other != staging_dir and not other.name.endswith(".old"):
+                try:
+                    _move_aside(other)
+                except FileNotFoundError:
+                    pass
+    for leftover in output_dir.parent.glob(f".{output_dir.name}.*.old"):
+        _discard(leftover)
+
+    staging_dir.mkdir()
+    return staging_dir
+
+
+def commit_staging(staging_dir, output_dir, fsync=False):
+    """Publish ``staging_dir`` as ``output_dir``, replacing any previous output."""
+    staging_dir, output_dir = Path(staging_dir), Path(output_dir)
+    if fsync:
+        fsync_directory(staging_dir, recursive=True)
+
+    if output_dir.exists():
+        previous = output_dir.with_name(f".{output_dir.name}.{uuid.uuid4().hex}.old")
+        os.rename(output_dir, previous)
+        os.rename(staging_dir, output_dir)
+        _discard(previous)
+    else:
+        os.rename(staging_dir, output_dir)
+
+    if fsync:
+        fsync_directory(output_dir.parent)
+
+
+def abort_staging(staging_dir):
+    """Throw away a staging directory without publishing it."""
+    staging_dir = Path(staging_dir)
+    if not staging_dir.exists():
+        return
+    # Rename first so a new staging dir for the same output is never removed
+    discarded = staging_dir.with_name(f"{staging_dir.name}.{uuid.uuid4().hex}.old")
+    os.rename(staging_dir, discarded)
+    _discard(discarded)
+
+
+def fsync_directory(directory, recursive=False):
+    """Flush a directory entry (and with ``recursive``, the files in it) to disk."""
+    directory = Path(directory)
+    if recursive:
+        for entry in directory.iterdir():
+            if entry.is_file():
+                fd = os.open(entry, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened for fsync on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def sync_filesystems():
+    """End-of-run flush for the ``run`` durability policy."""
+    if hasattr(os, "sync"):
+        os.sync()
+
+
+def wait_for_cleanup():
+    """Block until queued removals of old outputs have finished."""
+    _cleanup_pool.submit(lambda: None).result()
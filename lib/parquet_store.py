@@ -0,0 +1,177 @@
+"""
+Parquet datasets for the extraction log and video metadata.
+
+Each run appends its rows as new Parquet files to two Hive-partitioned
+datasets under ``parquet_dir`` (``log/`` and ``metadata/``, partitioned by
+``language`` and ``emotion``), so nothing already written is rewritten and
+several nodes can append at the same time. Metadata fields are stored as typed
+columns instead of a stringified dict. Readers prune partitions and use the
+column statistics, e.g.::
+
+    read_dataset("parquet", "metadata",
+                 filter=(field("language") == "HI") & (field("emotion") == "S")
+                 & (field("frame_count") > 20))
+
+Over many runs the datasets accumulate small files and superseded rows;
+``compact`` rewrites each partition as one file holding the latest row per
+video.
+
+pyarrow is optional and only needed when Parquet output is enabled.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from config.logger_config import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = ds = None
+
+LOG_DATASET = "log"
+METADATA_DATASET = "metadata"
+PARTITION_COLUMNS = ["language", "emotion"]
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "Parquet output requires pyarrow; install it with 'pip install pyarrow'"
+        )
+
+
+def field(name):
+    """Column reference for ``read_dataset`` filters."""
+    _require_pyarrow()
+    return ds.field(name)
+
+
+def _partitioning():
+    return ds.partitioning(
+        pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]), flavor="hive"
+    )
+
+
+def _column_type(name):
+    if name == "frame_count" or name == "quality_rejected":
+        return pa.int64()
+    if name.startswith("quality_"):
+        return pa.float64()
+    if name == "extracted_at":
+        return pa.timestamp("ms")
+    return None
+
+
+def flatten_log(log_df):
+    """Expand the log's ``metadata`` dict column into one column per field."""
+    if "metadata" not in log_df.columns:
+        return log_df
+    fields = pd.DataFrame(
+        [m if isinstance(m, dict) else {} for m in log_df["metadata"]],
+        index=log_df.index,
+    )
+    return pd.concat([log_df.drop(columns=["metadata"]), fields], axis=1)
+
+
+def to_table(df):
+    """Typed Arrow table; unknown all-empty columns become strings, not nulls."""
+    df = df.copy()
+    for name in PARTITION_COLUMNS:
+        if name not in df.columns:
+            df[name] = "unknown"
+        df[name] = df[name].fillna("unknown").astype(str)
+
+    columns = {}
+    for name in df.columns:
+        type_ = _column_type(name)
+        array = pa.array(df[name], type=type_, from_pandas=True)
+        if type_ is None and pa.types.is_null(array.type):
+            array = array.cast(pa.string())
+        columns[name] = array
+    return pa.table(columns)
+
+
+def append_run(parquet_dir, log_df, metadata_df):
+    """Write this run's rows as new files in both datasets; returns the run id."""
+    _require_pyarrow()
+    run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    extracted_at = pd.Timestamp.now().floor("ms")
+    for name, df in (
+        (LOG_DATASET, flatten_log(log_df)),
+        (METADATA_DATASET, metadata_df),
+    ):
+        if df.empty:
+            continue
+        df = df.assign(extracted_at=extracted_at)
+        ds.write_dataset(
+            to_table(df),
+            Path(parquet_dir) / name,
+            format="parquet",
+            partitioning=_partitioning(),
+            basename_template=f"part-{run_id}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        logger.info(f"Appended {len(df)} rows to {Path(parquet_dir) / name}")
+    return run_id
+
+
+def open_dataset(parquet_dir, name):
+    """The dataset with a schema unified over all runs (columns may differ per run)."""
+    _require_pyarrow()
+    path = Path(parquet_dir) / name
+    dataset = ds.dataset(path, format="parquet", partitioning=_partitioning())
+    schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+    if len(schemas) > 1:
+        schema = pa.unify_schemas(
+            [dataset.schema, *schemas], promote_options="permissive"
+        )
+        dataset = ds.dataset(
+            path, format="parquet", partitioning=_partitioning(), schema=schema
+        )
+    return dataset
+
+
+def read_dataset(parquet_dir, name=METADATA_DATASET, filter=None, columns=None):
+    """Read (a filtered part of) a dataset into a DataFrame."""
+    table = open_dataset(parquet_dir, name).to_table(filter=filter, columns=columns)
+    return table.to_pandas()
+
+
+def compact(parquet_dir):
+    """Rewrite both datasets as one file per partition, latest row per video."""
+    _require_pyarrow()
+    for name in (LOG_DATASET, METADATA_DATASET):
+        path = Path(parquet_dir) / name
+        if not path.exists():
+            continue
+        df = open_dataset(parquet_dir, name).to_table().to_pandas()
+        df = (
+            df.sort_values("extracted_at", kind="stable")
+            .drop_duplicates(subset="video_path", keep="last")
+            .sort_values("video_path")
+            .reset_index(drop=True)
+        )
+
+        # Write next to the dataset, then swap it in with two renames
+        compacted = path.with_name(f".{name}.{uuid.uuid4().hex}.compacting")
+        ds.write_dataset(
+            to_table(df),
+            compacted,
+            format="parquet",
+            partitioning=_partitioning(),
+            basename_template="part-compacted-{i}.parquet",
+        )
+        previous = path.with_name(f".{name}.{uuid.uuid4().hex}.old")
+        os.rename(path, previous)
+        os.rename(compacted, path)
+        shutil.rmtree(previous)
+        logger.info(f"Compacted {path} to {len(df)} rows")
@@ -0,0 +1,120 @@
+"""
+Per-job progress event logs for push-style status updates.
+
+Each extraction job gets a bounded ring buffer of small delta events
+(progress ticks, newly written frames, completion) with increasing ids.
+Subscribers block on a condition variable until something newer than the last
+id they saw arrives, so idle clients cost no CPU and no re-serialization of
+the full job status. A subscriber that falls behind the ring buffer is told
+so and can fetch one full snapshot before following the deltas again. The
+snapshot is folded from the job's own events, so it describes that job even
+after a newer one has started.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+TERMINAL_EVENTS = ("complete", "error")
+
+
+class JobEventLog:
+    def __init__(self, job_id, capacity=1024):
+        self.job_id = job_id
+        self._events = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._next_id = 1
+        self.finished = False
+        self._state = {
+            "job_id": job_id,
+            "progress": 0,
+            "frames": [],
+            "completed": False,
+            "error": None,
+        }
+
+    @property
+    def last_id(self):
+        with self._cond:
+            return self._next_id - 1
+
+    def publish(self, event_type, data):
+        with self._cond:
+            event = {
+                "id": self._next_id,
+                "type": event_type,
+                "data": data,
+                "time": time.time(),
+            }
+            self._next_id += 1
+            self._events.append(event)
+            self._apply(event_type, data)
+            if event_type in TERMINAL_EVENTS:
+                self.finished = True
+            self._cond.notify_all()
+            return event["id"]
+
+    def _apply(self, event_type, data):
+        if event_type == "frames":
+            self._state["frames"].extend(data["frames"])
+            return
+        self._state.update(data)
+        if event_type == "complete":
+            self._state.update(completed=True, progress=100)
+
+    def snapshot(self):
+        """Full state of this job as of its latest event."""
+        with self._cond:
+            return {
+                **self._state,
+                "frames": list(self._state["frames"]),
+                "finished": self.finished,
+            }
+
+    def _since(self, last_id):
+        # Caller holds the condition; returns (events, missed_some)
+        if not self._events:
+            return [], False
+        oldest = self._events[0]["id"]
+        missed = last_id + 1 < oldest
+        return [e for e in self._events if e["id"] > last_id], missed
+
+    def events_since(self, last_id):
+        with self._cond:
+            return self._since(last_id)
+
+    def wait(self, last_id, timeout):
+        """Block until events newer than ``last_id`` exist or ``timeout`` passes."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._next_id - 1 > last_id or self.finished, timeout=timeout
+            )
+            return self._since(last_id)
+
+
+class EventHub:
+    """Event logs of the most recent jobs, newest last."""
+
+    def __init__(self, keep_jobs=16, capacity=1024):
+        self.keep_jobs = keep_jobs
+        self.capacity = capacity
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_job(self):
+        job = JobEventLog(uuid.uuid4().hex[:12], self.capacity)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.keep_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id=None):
+        """The job with ``job_id``, or the latest job when no id is given."""
+        with self._lock:
+            if job_id is None:
+                return next(reversed(self._jobs.values()), None)
+            return self._jobs.get(job_id)
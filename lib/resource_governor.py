@@ -0,0 +1,140 @@
+"""
+Admission control for the web interface.
+
+Uploads, FFmpeg jobs and ZIP builds ask the governor for the temporary disk
+they are about to use, and FFmpeg jobs also for their CPU threads. Work that does not fit waits briefly in
+a bounded queue; once the queue is full, or the wait runs out, the request is
+rejected with a ``Retry-After`` estimate instead of piling onto saturated
+cores and disks. Cheap read-only routes never go through the governor, so
+they stay responsive while extraction runs.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import math
+import os
+import shutil
+import threading
+import time
+
+
+class AdmissionRejected(Exception):
+    """Raised when work cannot be admitted; ``retry_after`` is in seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    __slots__ = ("kind", "cpu_threads", "temp_bytes", "started")
+
+    def __init__(self, kind, cpu_threads, temp_bytes):
+        self.kind = kind
+        self.cpu_threads = cpu_threads
+        self.temp_bytes = temp_bytes
+        self.started = time.monotonic()
+
+
+def default_cpu_budget():
+    """All cores but one, which is left for request handling."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+class ResourceGovernor:
+    def __init__(
+        self,
+        max_cpu_threads=None,
+        max_temp_bytes=2 * 1024**3,
+        max_queue_depth=4,
+        disk_path=".",
+        min_free_bytes=1024**3,
+    ):
+        self.max_cpu_threads = max_cpu_threads or default_cpu_budget()
+        self.max_temp_bytes = max_temp_bytes
+        self.max_queue_depth = max_queue_depth
+        self.disk_path = disk_path
+        self.min_free_bytes = min_free_bytes
+
+        self._cond = threading.Condition()
+        self._cpu_in_use = 0
+        self._temp_in_use = 0
+        self._in_flight = {}
+        self._waiting = 0
+        # Smoothed duration per kind of work, used for Retry-After estimates
+        self._avg_duration = {}
+
+    def _fits(self, cpu_threads, temp_bytes):
+        if self._cpu_in_use and self._cpu_in_use + cpu_threads > self.max_cpu_threads:
+            return False
+        if self._temp_in_use and self._temp_in_use + temp_bytes > self.max_temp_bytes:
+            return False
+        return True
+
+    def _retry_after(self, kind):
+        avg = self._avg_duration.get(kind, 5.0)
+        return max(
+            1, math.ceil(avg * (self._waiting + 1) / max(len(self._in_flight), 1))
+        )
+
+    def acquire(self, kind, cpu_threads=0, temp_bytes=0, wait=0.0):
+        """Reserve resources for a unit of work, waiting up to ``wait`` seconds."""
+        cpu_threads = min(cpu_threads, self.max_cpu_threads)
+        if temp_bytes:
+            free = shutil.disk_usage(self.disk_path).free
+            if free - temp_bytes < self.min_free_bytes:
+                raise AdmissionRejected("Not enough free disk space", 60)
+
+        with self._cond:
+            if not self._fits(cpu_threads, temp_bytes):
+                if self._waiting >= self.max_queue_depth or wait <= 0:
+                    raise AdmissionRejected(
+                        f"Server busy ({kind})", self._retry_after(kind)
+                    )
+                self._waiting += 1
+                try:
+                    admitted = self._cond.wait_for(
+                        lambda: self._fits(cpu_threads, temp_bytes), timeout=wait
+                    )
+                finally:
+                    self._waiting -= 1
+                if not admitted:
+                    raise AdmissionRejected(
+                        f"Server busy ({kind})", self._retry_after(kind)
+                    )
+
+            ticket = Ticket(kind, cpu_threads, temp_bytes)
+            self._cpu_in_use += cpu_threads
+            self._temp_in_use += temp_bytes
+            self._in_flight[id(ticket)] = ticket
+            return ticket
+
+    def release(self, ticket):
+        with self._cond:
+            if self._in_flight.pop(id(ticket), None) is None:
+                return
+            self._cpu_in_use -= ticket.cpu_threads
+            self._temp_in_use -= ticket.temp_bytes
+            duration = time.monotonic() - ticket.started
+            previous = self._avg_duration.get(ticket.kind)
+            self._avg_duration[ticket.kind] = (
+                duration if previous is None else 0.8 * previous + 0.2 * duration
+            )
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """Current load, for the status and config routes."""
+        with self._cond:
+            in_flight = {}
+            for ticket in self._in_flight.values():
+                in_flight[ticket.kind] = in_flight.get(ticket.kind, 0) + 1
+            return {
+                "cpu_threads_in_use": self._cpu_in_use,
+                "cpu_threads_max": self.max_cpu_threads,
+                "temp_bytes_in_use": self._temp_in_use,
+                "temp_bytes_max": self.max_temp_bytes,
+                "queue_depth": self._waiting,
+                "queue_depth_max": self.max_queue_depth,
+                "in_flight": in_flight,
+            }
@@ -0,0 +1,94 @@
+"""
+Result cache for web extractions.
+
+Maps an extraction key (content hash of the video plus the extraction
+settings) to the output directory and frame list of a finished job, so a
+repeated upload of the same clip completes without running FFmpeg.
+
+The cache is only an index and never deletes frames: the directories belong to
+the retention manager, which evicts them by its own budget and access times and
+then drops their entries through ``discard_dir``. Entries whose directory was
+removed or re-extracted behind the cache's back are dropped on lookup.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import json
+import os
+import threading
+from pathlib import Path
+
+INDEX_FILE = ".result_cache.json"
+# Written into each cached output directory; a directory that was re-extracted
+# since caching no longer carries the key and its entry is dropped
+MARKER_FILE = ".cache_key"
+
+
+class ResultCache:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index_path = self.root / INDEX_FILE
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        tmp_path = self.index_path.with_name(f"{INDEX_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _is_valid(self, key, entry):
+        try:
+            return (self.root / entry["output_dir"] / MARKER_FILE).read_text() == key
+        except OSError:
+            return False
+
+    def get(self, key):
+        """Return the cached entry for ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not self._is_valid(key, entry):
+                del self._entries[key]
+                self._save()
+                return None
+            return dict(entry)
+
+    def put(self, key, output_dir, frames):
+        """Record a finished extraction stored in ``output_dir``."""
+        output_dir = Path(output_dir)
+        (output_dir / MARKER_FILE).write_text(key)
+        rel_dir = output_dir.relative_to(self.root).as_posix()
+
+        with self._lock:
+            # Drop entries whose directory this extraction just replaced
+            for old_key in [
+                k for k, e in self._entries.items() if e["output_dir"] == rel_dir
+            ]:
+                del self._entries[old_key]
+            self._entries[key] = {"output_dir": rel_dir, "frames": list(frames)}
+            self._save()
+
+    def discard_dir(self, output_dir):
+        """Forget entries stored in ``output_dir`` after it was removed elsewhere."""
+        with self._lock:
+            stale = [
+                k for k, e in self._entries.items() if e["output_dir"] == output_dir
+            ]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
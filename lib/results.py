@@ -0,0 +1,56 @@
+"""
+Structured results of the programmatic extraction API.
+
+``FrameExtractor.extract_video`` returns one ``VideoResult`` per input,
+describing exactly what was written, so callers embedding the extractor do not
+need to list the output directory again. Both types use ``__slots__``: a
+large batch keeps one ``FrameResult`` per frame in memory.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# VideoResult.status values
+SUCCESS = "success"
+SKIPPED = "skipped"
+DEDUPLICATED = "deduplicated"
+FAILED = "failed"
+
+
+@dataclass(slots=True)
+class FrameResult:
+    """One extracted frame.
+
+    ``path`` is the image file, or for ``raw``/``tensor`` output the file that
+    holds all frames, at position ``index`` within this video.
+    """
+
+    index: int
+    path: Path
+    pts: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+@dataclass(slots=True)
+class VideoResult:
+    """Outcome of extracting one video; ``timings`` are seconds per stage."""
+
+    video_path: Path
+    status: str
+    output_dir: Optional[Path] = None
+    frames: List[FrameResult] = field(default_factory=list)
+    metadata: Dict = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != FAILED
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frames)
@@ -0,0 +1,258 @@
+"""
+Disk retention for the web interface's outputs.
+
+Frame directories under the output root are kept within a byte budget and a
+time-to-live. Directories not accessed for ``ttl`` seconds are removed, and
+while the total exceeds the budget the least recently accessed ones go first.
+Accesses are recorded with ``touch`` (the web routes call it when serving
+frames or a ZIP); a directory never touched counts from when it was written.
+Uploads and temporary ZIP archives left behind by failed or abandoned
+requests are swept once they are older than ``orphan_ttl``.
+
+A background thread does the work in small steps: each tick measures and
+removes at most ``batch_size`` entries, and directory sizes are cached by
+mtime so unchanged directories are never rescanned. A large backlog is worked
+off over several ticks instead of in one long pass.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from config.logger_config import logger
+
+ACCESS_FILE = ".retention.json"
+# Delay between ticks while a backlog is being worked off
+BACKLOG_INTERVAL = 0.5
+
+
+def _tree_bytes(path):
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    total += _tree_bytes(entry.path)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+    except FileNotFoundError:
+        pass
+    return total
+
+
+def _remove(path):
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+class RetentionManager:
+    def __init__(
+        self,
+        output_root,
+        budget_bytes,
+        ttl=None,
+        orphan_dirs=(),
+        orphan_ttl=3600.0,
+        result_cache=None,
+        in_use=None,
+        interval=30.0,
+        batch_size=16,
+    ):
+        self.root = Path(output_root)
+        self.budget_bytes = budget_bytes
+        self.ttl = ttl
+        self.orphan_dirs = [Path(d) for d in orphan_dirs]
+        self.orphan_ttl = orphan_ttl
+        self.result_cache = result_cache
+        # Returns paths the running job still needs (its input and output)
+        self.in_use = in_use or (lambda: ())
+        self.interval = interval
+        self.batch_size = batch_size
+        self.access_path = self.root / ACCESS_FILE
+
+        self._lock = threading.Lock()
+        self._access = {}
+        self._sizes = {}
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.access_path) as f:
+                self._access = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            access = dict(self._access)
+            self._dirty = False
+        tmp_path = self.access_path.with_name(f"{ACCESS_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(access, f)
+        os.replace(tmp_path, self.access_path)
+
+    @property
+    def total_bytes(self):
+        """Size of the frame directories as of the last measurement."""
+        with self._lock:
+            return sum(size for _, size in self._sizes.values())
+
+    def touch(self, name):
+        """Mark the frame directory ``name`` (relative to the root) as just used."""
+        if not name or name.startswith("."):
+            return
+        with self._lock:
+            self._access[name] = time.time()
+            self._dirty = True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="output-retention", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                backlog = self.sweep_step()
+            except Exception as e:
+                logger.warning(f"Retention sweep failed: {e}")
+                backlog = False
+            delay = BACKLOG_INTERVAL if backlog else self.interval
+
+    def sweep_step(self):
+        """Do one bounded increment of work; returns True while a backlog remains."""
+        now = time.time()
+        protected = {Path(p).name for p in self.in_use() if p}
+        removals = self.batch_size
+        backlog = False
+
+        for directory in self.orphan_dirs:
+            removed, more = self._sweep_orphans(directory, now, protected, removals)
+            removals -= removed
+            backlog |= more
+
+        # Measure new or changed directories, a batch at a time
+        names = self._frame_dirs()
+        usage = []
+        measured = 0
+        for name, mtime_ns in names.items():
+            known = self._sizes.get(name)
+            if known is None or known[0] != mtime_ns:
+                if measured >= self.batch_size:
+                    backlog = True
+                    continue
+                known = (mtime_ns, _tree_bytes(self.root / name))
+                with self._lock:
+                    self._sizes[name] = known
+                measured += 1
+            last_access = max(self._access.get(name, 0.0), mtime_ns / 1e9)
+            usage.append((last_access, name, known[1]))
+
+        # Least recently accessed first: expired entries, then whatever is over budget
+        usage.sort()
+        total = sum(size for _, _, size in usage)
+        for last_access, name, size in usage:
+            expired = self.ttl is not None and now - last_access > self.ttl
+            over_budget = self.budget_bytes is not None and total > self.budget_bytes
+            if not expired and not over_budget:
+                break
+            if name in protected or self._is_being_written(name):
+                continue
+            if removals <= 0:
+                backlog = True
+                break
+            reason = "expired" if expired else "over budget"
+            self._evict(name, size, reason)
+            total -= size
+            removals -= 1
+
+        with self._lock:
+            for name in set(self._sizes) - set(names):
+                del self._sizes[name]
+            for name in set(self._access) - set(names):
+                del self._access[name]
+                self._dirty = True
+        self._save()
+        return backlog
+
+    def _frame_dirs(self):
+        """``{name: mtime_ns}`` of the published frame directories."""
+        dirs = {}
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    # Skips staging dirs, old outputs awaiting removal and indexes
+                    if entry.name.startswith(".") or not entry.is_dir():
+                        continue
+                    dirs[entry.name] = entry.stat().st_mtime_ns
+        except FileNotFoundError:
+            pass
+        return dirs
+
+    def _is_being_written(self, name):
+        return (self.root / f".{name}.staging").exists()
+
+    def _evict(self, name, size, reason):
+        path = self.root / name
+        # Rename first so a request never sees a half-deleted directory
+        discarded = path.with_name(f".{name}.{uuid.uuid4().hex}.old")
+        try:
+            os.rename(path, discarded)
+        except OSError as e:
+            logger.warning(f"Could not evict {path}: {e}")
+            return
+        shutil.rmtree(discarded, ignore_errors=True)
+        with self._lock:
+            self._sizes.pop(name, None)
+            self._access.pop(name, None)
+            self._dirty = True
+        if self.result_cache is not None:
+            self.result_cache.discard_dir(name)
+        logger.info(f"Evicted frames {name} ({size} bytes, {reason})")
+
+    def _sweep_orphans(self, directory, now, protected, limit):
+        """Remove entries older than ``orphan_ttl``; returns ``(removed, more)``."""
+        removed = 0
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return 0, False
+        for entry in entries:
+            if entry.name in protected:
+                continue
+            try:
+                age = now - entry.stat(follow_symlinks=False).st_mtime
+            except FileNotFoundError:
+                continue
+            if age <= self.orphan_ttl:
+                continue
+            if removed >= limit:
+                return removed, True
+            _remove(Path(entry.path))
+            removed += 1
+            logger.info(f"Removed orphaned {entry.path} ({age / 3600:.1f} h old)")
+        return removed, False
@@ -0,0 +1,197 @@
+"""
+Opt-in profiling of extraction runs.
+
+Collects, per video, the wall time of each processing stage and the resource
+usage of every FFmpeg child (CPU time, peak RSS, I/O bytes and FFmpeg's own
+``-benchmark`` figures), and profiles the Python side of the run with
+cProfile. ``write_report`` ranks the slowest videos and stages so a slow run
+can be attributed to decoding/encoding (child CPU), disk (child I/O with
+little CPU), or Python overhead (stage time not spent in children).
+
+cProfile follows a single thread. Videos extracted on worker threads
+(``extract_videos`` with an executor) are profiled separately around each
+``extract_video`` call and merged into the report.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import cProfile
+import json
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from config.logger_config import logger
+
+# Time blocked in these is waiting on FFmpeg or workers, not Python work
+BLOCKING_CALLS = ("acquire", "sleep", "wait", "wait4", "waitpid", "poll")
+
+
+def _function_name(name):
+    """Bare name of a cProfile entry, e.g. ``sleep`` for ``time.sleep``."""
+    # Builtins appear as "<method 'acquire' of ...>" or "<built-in method time.sleep>"
+    if "'" in name:
+        return name.split("'")[1]
+    return name.strip("<>").split()[-1].rsplit(".", 1)[-1]
+
+
+CHILD_TOTALS = (
+    "cpu_user",
+    "cpu_system",
+    "io_read_bytes",
+    "io_write_bytes",
+    "io_rchar",
+    "io_wchar",
+)
+
+
+class RunProfiler:
+    def __init__(self, report_dir, top=20):
+        self.report_dir = Path(report_dir)
+        self.top = top
+        # Runs started in the same second must not overwrite each other's report
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._videos = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        # Profiles the thread that calls start(), i.e. the one driving the run
+        self._python = cProfile.Profile()
+        self._owner = None
+        # Finished profiles of work done on other threads
+        self._thread_profiles = []
+
+    def start(self):
+        self._owner = threading.get_ident()
+        self._python.enable()
+
+    @contextmanager
+    def profile_thread(self):
+        """Profile the enclosed work when it runs outside the driving thread."""
+        if threading.get_ident() == self._owner:
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler, which then sees every thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._thread_profiles.append(profile)
+
+    def _python_stats(self):
+        stats = pstats.Stats(self._python)
+        with self._lock:
+            if self._thread_profiles:
+                stats.add(*self._thread_profiles)
+        return stats
+
+    def _video(self, video_path):
+        return self._videos.setdefault(str(video_path), {"stages": {}, "children": []})
+
+    def laps(self, video_path):
+        """Return ``lap(stage)``, which books the time since the previous lap."""
+        last = time.perf_counter()
+
+        def lap(stage):
+            nonlocal last
+            now = time.perf_counter()
+            with self._lock:
+                stages = self._video(video_path)["stages"]
+                stages[stage] = stages.get(stage, 0.0) + now - last
+            last = now
+
+        return lap
+
+    def record_child(self, video_path, stage, usage):
+        with self._lock:
+            self._video(video_path)["children"].append({"stage": stage, **usage})
+
+    def report(self):
+        videos = []
+        stage_totals = {}
+        for video_path, data in self._videos.items():
+            children = {key: 0 for key in CHILD_TOTALS}
+            max_rss_kb = 0
+            for child in data["children"]:
+                for key in CHILD_TOTALS:
+                    children[key] += child.get(key, 0)
+                max_rss_kb = max(max_rss_kb, child.get("max_rss_kb", 0))
+            for stage, seconds in data["stages"].items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+            videos.append(
+                {
+                    "video_path": video_path,
+                    "seconds": round(sum(data["stages"].values()), 3),
+                    "stages": {k: round(v, 3) for k, v in data["stages"].items()},
+                    "children": {**children, "max_rss_kb": max_rss_kb},
+                    "ffmpeg_runs": data["children"],
+                }
+            )
+        videos.sort(key=lambda v: v["seconds"], reverse=True)
+
+        stats = self._python_stats()
+        hotspots = sorted(
+            (
+                {
+                    "function": f"{Path(file).name}:{line}({name})",
+                    "calls": calls,
+                    "self_seconds": round(self_time, 4),
+                    "cumulative_seconds": round(cumulative, 4),
+                }
+                for (file, line, name), (_, calls, self_time, cumulative, _) in (
+                    stats.stats.items()
+                )
+                if _function_name(name) not in BLOCKING_CALLS
+            ),
+            key=lambda h: h["self_seconds"],
+            reverse=True,
+        )[: self.top]
+
+        return {
+            "run_id": self.run_id,
+            "wall_seconds": round(time.perf_counter() - self._started, 3),
+            "stages": dict(
+                sorted(
+                    ((k, round(v, 3)) for k, v in stage_totals.items()),
+                    key=lambda kv: kv[1],
+                    reverse=True,
+                )
+            ),
+            "slowest_videos": videos,
+            "python_threads_profiled": 1 + len(self._thread_profiles),
+            "python_hotspots": hotspots,
+        }
+
+    def write_report(self):
+        """Stop profiling and write ``run-<id>.json`` and ``run-<id>.prof``."""
+        self._python.disable()
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        report = self.report()
+        report_path = self.report_dir / f"run-{self.run_id}.json"
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        # Open with `python -m pstats` or snakeviz for the full call graph
+        self._python_stats().dump_stats(self.report_dir / f"run-{self.run_id}.prof")
+
+        logger.info(f"Profile report written to {report_path}")
+        stages = ", ".join(f"{k} {v:.1f}s" for k, v in report["stages"].items())
+        logger.info(f"Time by stage: {stages}")
+        for video in report["slowest_videos"][:5]:
+            children = video["children"]
+            logger.info(
+                f"  {video['seconds']:.1f}s {video['video_path']} "
+                f"(FFmpeg cpu {children['cpu_user'] + children['cpu_system']:.1f}s, "
+                f"rss {children['max_rss_kb'] // 1024} MiB, "
+                f"read {children['io_rchar'] // 2**20} MiB, "
+                f"written {children['io_wchar'] // 2**20} MiB)"
+            )
+        return report_path
@@ -0,0 +1,130 @@
+"""
+Frame sampling policies for FFmpeg extraction.
+
+A policy turns the sampling settings of a ``Config`` into the FFmpeg filter that
+selects frames. The time window (``start_time``/``end_time``) is applied on the
+input side (``-ss``/``-t`` before ``-i``) so that footage outside the window is
+never demuxed or decoded, whatever the policy; a ``trim`` filter then makes the
+end of the window exact.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+# Seconds decoded past the last explicit timestamp so the frame at or after it exists
+TIMESTAMP_TAIL = 1.0
+
+
+def _format_seconds(value):
+    return f"{value:.6f}".rstrip("0").rstrip(".") or "0"
+
+
+def iframe_filter(cfg, offset):
+    return "select='eq(pict_type,I)'"
+
+
+def fps_filter(cfg, offset):
+    if cfg.sample_fps <= 0:
+        raise ValueError(f"sample_fps must be positive, got {cfg.sample_fps}")
+    return f"fps={cfg.sample_fps}"
+
+
+def scene_filter(cfg, offset):
+    if not 0 < cfg.scene_threshold < 1:
+        raise ValueError(
+            f"scene_threshold must be between 0 and 1, got {cfg.scene_threshold}"
+        )
+    return f"select='gt(scene,{cfg.scene_threshold})'"
+
+
+def timestamps_filter(cfg, offset):
+    """Select the first frame at or after each requested timestamp."""
+    if not cfg.timestamps:
+        raise ValueError("sampling_mode 'timestamps' requires at least one timestamp")
+    # Clamping one into the window would pass off its first frame as this timestamp
+    start, end = cfg.start_time or 0.0, cfg.end_time
+    outside = sorted(
+        ts for ts in cfg.timestamps if ts < start or (end is not None and ts >= end)
+    )
+    if outside:
+        end_text = _format_seconds(end) if end is not None else "end"
+        raise ValueError(
+            f"timestamps {outside} lie outside the time window "
+            f"[{_format_seconds(start)}, {end_text})"
+        )
+    # Input seeking resets timestamps to zero at the seek point
+    terms = []
+    for ts in sorted(set(cfg.timestamps)):
+        t = _format_seconds(max(ts - offset, 0.0))
+        terms.append(f"gte(t,{t})*(isnan(prev_t)+lt(prev_t,{t}))")
+    return f"select='{'+'.join(terms)}'"
+
+
+SAMPLING_POLICIES = {
+    "iframe": iframe_filter,
+    "fps": fps_filter,
+    "scene": scene_filter,
+    "timestamps": timestamps_filter,
+}
+
+
+def register_sampling_policy(name, filter_fn):
+    """Register a policy: ``filter_fn(cfg, offset) -> str`` returning a ``-vf`` graph."""
+    SAMPLING_POLICIES[name] = filter_fn
+
+
+def get_sampling_policy(name):
+    try:
+        return SAMPLING_POLICIES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown sampling mode '{name}'. Available: {', '.join(SAMPLING_POLICIES)}"
+        ) from None
+
+
+def sampling_window(cfg):
+    """Return ``(start, duration)`` in seconds; either may be None for unbounded."""
+    start, end = cfg.start_time, cfg.end_time
+
+    if cfg.sampling_mode == "timestamps" and cfg.timestamps:
+        # Only decode the span that contains the requested timestamps
+        if start is None:
+            start = min(cfg.timestamps)
+        if end is None:
+            end = max(cfg.timestamps) + TIMESTAMP_TAIL
+
+    if start is not None and start < 0:
+        raise ValueError(f"start_time must not be negative, got {start}")
+    if start is not None and end is not None and end <= start:
+        raise ValueError(f"end_time ({end}) must be greater than start_time ({start})")
+
+    start = start or None
+    duration = None
+    if end is not None:
+        duration = end - (start or 0.0)
+    return start, duration
+
+
+def build_sampling_args(cfg, window=None):
+    """Return ``(input_args, video_filter)`` for the configured sampling policy.
+
+    ``window`` is an explicit ``(start, end)`` in seconds overriding the
+    configured one, e.g. one segment of a video split for parallel extraction.
+    """
+    policy = get_sampling_policy(cfg.sampling_mode)
+    if window is None:
+        start, duration = sampling_window(cfg)
+    else:
+        start, end = window
+        duration = end - (start or 0.0) if end is not None else None
+
+    input_args = []
+    if start is not None:
+        input_args += ["-ss", _format_seconds(start)]
+    video_filter = policy(cfg, start or 0.0)
+    if duration is not None:
+        input_args += ["-t", _format_seconds(duration)]
+        # The demuxer stops on decode timestamps, which run ahead of presentation
+        # timestamps with B-frames; trim makes the end of the window exact
+        video_filter = f"trim=end={_format_seconds(duration)},{video_filter}"
+
+    return input_args, video_filter
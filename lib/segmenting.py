@@ -0,0 +1,116 @@
+"""
+Keyframe-aligned segmentation of a single video.
+
+A long video is cut into time segments whose boundaries sit on keyframes, so
+that each segment can be decoded by its own FFmpeg process: input seeking
+(``-ss``) lands directly on the boundary keyframe and no frame is decoded
+twice. The preceding segment ends a millisecond short of that keyframe, well
+inside the gap to the frame before it, so every frame belongs to exactly one
+segment and concatenating the segments' frames reproduces the output of a
+single process.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import re
+import subprocess
+from fractions import Fraction
+
+from lib.ffmpeg_supervisor import parse_duration
+
+TIME_BASE_RE = re.compile(r"^#tb 0: (\d+)/(\d+)")
+# Seconds between a segment's end and the keyframe that starts the next one
+BOUNDARY_GUARD = 0.001
+
+
+def keyframe_listing_command(ffmpeg_path, video_path):
+    """FFmpeg command listing the keyframe packets of the first video stream.
+
+    Only keyframe packets are demuxed and they are stream-copied into FFmpeg's
+    ``framecrc`` listing on stdout, so nothing is decoded and it is near-instant.
+    The usual input banner (duration, stream descriptions) goes to stderr.
+    """
+    return [
+        str(ffmpeg_path),
+        "-nostdin",
+        "-discard",
+        "nokey",
+        "-i",
+        str(video_path),
+        "-map",
+        "0:v:0",
+        "-c",
+        "copy",
+        "-f",
+        "framecrc",
+        "-",
+    ]
+
+
+def parse_keyframe_listing(listing):
+    """Sorted keyframe times (exact fractions of a second) from a framecrc listing."""
+    time_base = None
+    keyframes = []
+    for line in listing.splitlines():
+        match = TIME_BASE_RE.match(line)
+        if match:
+            time_base = Fraction(int(match.group(1)), int(match.group(2)))
+        elif line and not line.startswith("#") and time_base is not None:
+            # stream, dts, pts, duration, size, checksum
+            pts = line.split(",")[2].strip()
+            if pts.lstrip("-").isdigit():
+                keyframes.append(int(pts) * time_base)
+    return sorted(set(keyframes))
+
+
+def probe_keyframes(ffmpeg_path, video_path, timeout=120.0):
+    """Return ``(keyframe_times, duration)`` of the first video stream."""
+    result = subprocess.run(
+        keyframe_listing_command(ffmpeg_path, video_path),
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        check=True,
+    )
+    duration = None
+    for line in result.stderr.splitlines():
+        duration = parse_duration(line)
+        if duration:
+            break
+    return parse_keyframe_listing(result.stdout), duration
+
+
+def plan_segments(keyframes, duration, count, start=None, end=None, min_length=0.0):
+    """Split ``[start, end)`` into at most ``count`` keyframe-aligned segments.
+
+    Returns a list of ``(seg_start, seg_end)`` in seconds, where ``None`` means
+    the start or end of the input. Segments are never shorter than
+    ``min_length`` seconds; a single segment means the split is not worthwhile.
+    """
+    lower = Fraction(start or 0)
+    upper = Fraction(end) if end is not None else None
+    span_end = upper if upper is not None else Fraction(duration or 0)
+    span = float(span_end - lower)
+    if min_length > 0:
+        count = min(count, int(span // min_length))
+    candidates = [k for k in keyframes if lower < k < span_end]
+    if count < 2 or not candidates:
+        return [(start, end)]
+
+    boundaries = []
+    for i in range(1, count):
+        target = lower + (span_end - lower) * Fraction(i, count)
+        nearest = min(candidates, key=lambda k: abs(k - target))
+        previous = boundaries[-1] if boundaries else lower
+        # Both the segment this boundary closes and the rest of the span must
+        # stay at least min_length long
+        if (
+            nearest > previous
+            and float(nearest - previous) >= min_length
+            and float(span_end - nearest) >= min_length
+        ):
+            boundaries.append(nearest)
+
+    starts = [start, *(float(b) for b in boundaries)]
+    ends = [float(b) - BOUNDARY_GUARD for b in boundaries] + [end]
+    return list(zip(starts, ends))
@@ -0,0 +1,127 @@
+"""
+Pre-flight probing of input videos.
+
+Before extraction starts every candidate is probed once for its duration,
+video codec, resolution and keyframe layout (GOP). Files FFmpeg cannot open,
+or that have no video stream or no keyframes, are reported invalid so they are
+rejected up front instead of failing mid-run, and the durations let the run
+order its queue longest-first and estimate the total work.
+
+The probe is the keyframe listing used for segmenting (only keyframe packets
+are demuxed, nothing is decoded), so it costs a fraction of a second per file
+and its keyframes are reused when a video is later split into segments.
+Probes run concurrently on a thread pool; each one is a separate FFmpeg process.
+"""
+
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import List, Optional
+
+from lib.ffmpeg_supervisor import parse_duration
+from lib.segmenting import keyframe_listing_command, parse_keyframe_listing
+
+# First video stream of the input banner, e.g.
+# "Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p, 320x240 [SAR 1:1]"
+VIDEO_STREAM_RE = re.compile(
+    r"Stream #0:\d+\S*: Video: (\w+).*?, (\d{2,5})x(\d{2,5})[,\s]"
+)
+
+
+@dataclass
+class VideoProbe:
+    path: str
+    valid: bool
+    error: Optional[str] = None
+    duration: Optional[float] = None
+    codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    keyframes: List[Fraction] = field(default_factory=list, repr=False)
+
+    @property
+    def gop_seconds(self):
+        """Mean keyframe interval in seconds."""
+        if len(self.keyframes) < 2:
+            return self.duration
+        return float(self.keyframes[-1] - self.keyframes[0]) / (len(self.keyframes) - 1)
+
+    def keyframes_between(self, start=None, end=None):
+        return sum(
+            1
+            for k in self.keyframes
+            if (start is None or k >= start) and (end is None or k <= end)
+        )
+
+    def summary(self):
+        """Columns for the metadata CSV."""
+        gop = self.gop_seconds
+        return {
+            "duration": round(self.duration, 3) if self.duration else None,
+            "codec": self.codec,
+            "width": self.width,
+            "height": self.height,
+            "gop_seconds": round(gop, 3) if gop else None,
+        }
+
+
+def _last_error(stderr):
+    lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+    return lines[-1] if lines else "no output"
+
+
+def probe_video(ffmpeg_path, video_path, timeout=120.0):
+    """Probe one video; never raises for a bad input, see ``VideoProbe.valid``."""
+    path = str(video_path)
+    try:
+        result = subprocess.run(
+            keyframe_listing_command(ffmpeg_path, video_path),
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return VideoProbe(path, False, f"probe timed out after {timeout:.0f}s")
+    except OSError as e:
+        return VideoProbe(path, False, f"probe could not run FFmpeg: {e}")
+
+    # FFmpeg exits 0 even when it fails to open the input, so judge the output
+    duration = None
+    for line in result.stderr.splitlines():
+        duration = parse_duration(line)
+        if duration:
+            break
+    stream = VIDEO_STREAM_RE.search(result.stderr)
+    keyframes = parse_keyframe_listing(result.stdout)
+
+    probe = VideoProbe(path, True, duration=duration, keyframes=keyframes)
+    if stream:
+        probe.codec = stream.group(1)
+        probe.width, probe.height = int(stream.group(2)), int(stream.group(3))
+
+    if result.returncode != 0 or (not stream and not keyframes):
+        probe.valid = False
+        probe.error = _last_error(result.stderr)
+    elif not stream:
+        probe.valid, probe.error = False, "no video stream"
+    elif not keyframes:
+        probe.valid, probe.error = False, "no decodable keyframes"
+    elif not duration:
+        probe.valid, probe.error = False, "unknown duration"
+    return probe
+
+
+def probe_videos(ffmpeg_path, video_paths, workers=8, timeout=120.0):
+    """Probe all videos concurrently; returns ``{str(path): VideoProbe}``."""
+    with ThreadPoolExecutor(
+        max_workers=max(1, workers), thread_name_prefix="probe"
+    ) as pool:
+        probes = pool.map(
+            lambda path: probe_video(ffmpeg_path, path, timeout), video_paths
+        )
+        return {probe.path: probe for probe in probes}
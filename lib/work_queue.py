@@ -0,0 +1,283 @@
+__author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from config.logger_config import logger
+
+
+class ClaimLostError(Exception):
+    """Raised when another node has reclaimed a task this node was working on."""
+
+
+def default_node_id():
+    """Return an identifier unique to this process on this host."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """Coordinator-free work queue kept on shared storage.
+
+    Every node scanning the same input tree builds the same list of task keys.
+    A node claims a task by atomically creating ``claims/<task>.lock`` with
+    ``O_CREAT | O_EXCL``, which is safe on NFS v3+ and local filesystems. While
+    a node works it refreshes the mtime of its claim files; claims whose mtime
+    is older than ``lease_timeout`` belong to a dead node and may be reclaimed.
+    Finished tasks get a ``done/<task>`` marker so they are never run twice.
+
+    Lease ages are measured against the storage server's clock (read back from
+    a heartbeat file) so clock skew between nodes does not matter.
+
+    A node that was only slow, not dead, can lose its lease to another node.
+    Claims are therefore fenced: the heartbeat stops refreshing, and ``complete``
+    stops finishing, any claim that no longer names this node. Callers check
+    ``owns`` before publishing results.
+    """
+
+    def __init__(
+        self, queue_dir, node_id=None, lease_timeout=300.0, heartbeat_interval=30.0
+    ):
+        self.queue_dir = Path(queue_dir)
+        self.node_id = node_id or default_node_id()
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval
+
+        self.claims_dir = self.queue_dir / "claims"
+        self.done_dir = self.queue_dir / "done"
+        self.nodes_dir = self.queue_dir / "nodes"
+        self.shards_dir = self.queue_dir / "shards"
+        for directory in (
+            self.claims_dir,
+            self.done_dir,
+            self.nodes_dir,
+            self.shards_dir,
+        ):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self._held = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+
+    @staticmethod
+    def task_id(key):
+        """Map a task key (e.g. a relative video path) to a filesystem-safe id."""
+        return hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+
+    def _claim_path(self, task):
+        return self.claims_dir / f"{task}.lock"
+
+    def _done_path(self, task):
+        return self.done_dir / task
+
+    def _server_now(self):
+        """Current time according to the shared storage."""
+        beat = self.nodes_dir / self.node_id
+        beat.touch(exist_ok=True)
+        return beat.stat().st_mtime
+
+    def is_done(self, key):
+        return self._done_path(self.task_id(key)).exists()
+
+    def claim(self, key):
+        """Try to take ownership of ``key``. Returns True if this node now owns it."""
+        task = self.task_id(key)
+        if self._done_path(task).exists():
+            return False
+
+        claim_path = self._claim_path(task)
+        if self._take_claim(task, claim_path, key):
+            return True
+
+        if not self._is_stale(claim_path):
+            return False
+
+        # Move the stale claim aside; rename is atomic so only one node wins.
+        tombstone = self.claims_dir / f"{task}.{self.node_id}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(claim_path, tombstone)
+        except FileNotFoundError:
+            return False
+
+        if not self._is_stale(tombstone):
+            # Another node reclaimed it between our check and the rename; put it back.
+            try:
+                os.link(tombstone, claim_path)
+            except OSError:
+                pass
+            tombstone.unlink(missing_ok=True)
+            return False
+
+        tombstone.unlink(missing_ok=True)
+        logger.warning(f"Node {self.node_id} reclaimed stale task {key}")
+        return self._take_claim(task, claim_path, key)
+
+    def _take_claim(self, task, claim_path, key):
+        if not self._create_claim(claim_path, key):
+            return False
+        # The owner marks a task done before dropping its claim, so the claim
+        # just created may follow a completion the check in claim() missed
+        if self._done_path(task).exists():
+            claim_path.unlink(missing_ok=True)
+            return False
+        return self._mark_held(task)
+
+    def _create_claim(self, claim_path, key):
+        try:
+            fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {"node": self.node_id, "key": str(key), "claimed_at": time.time()}, f
+            )
+        return True
+
+    def _mark_held(self, task):
+        with self._held_lock:
+            self._held.add(task)
+        return True
+
+    def _is_stale(self, claim_path):
+        try:
+            mtime = claim_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return self._server_now() - mtime > self.lease_timeout
+
+    def owns(self, key):
+        """Check that the claim on ``key`` still names this node."""
+        return self._owns_task(self.task_id(key))
+
+    def _owns_task(self, task):
+        try:
+            with open(self._claim_path(task)) as f:
+                return json.load(f).get("node") == self.node_id
+        except (OSError, ValueError):
+            return False
+
+    def complete(self, key, status="success"):
+        """Record ``key`` as finished and drop the claim.
+
+        Returns False, leaving the task to its new owner, if the claim was lost.
+        """
+        task = self.task_id(key)
+        if not self._owns_task(task):
+            logger.warning(f"Node {self.node_id} lost claim on {key}; not completing")
+            self._forget(task)
+            return False
+        with open(self._done_path(task), "w") as f:
+            json.dump({"node": self.node_id, "key": str(key), "status": status}, f)
+        self._release(task)
+        return True
+
+    def release(self, key):
+        """Give up a claim without marking the task done."""
+        self._release(self.task_id(key))
+
+    def _release(self, task):
+        # Never remove a claim that now belongs to another node
+        if self._owns_task(task):
+            self._claim_path(task).unlink(missing_ok=True)
+        self._forget(task)
+
+    def _forget(self, task):
+        with self._held_lock:
+            self._held.discard(task)
+
+    def pending(self, keys):
+        """Keys that are not yet done (claimed by someone or still free)."""
+        return [key for key in keys if not self.is_done(key)]
+
+    def start_heartbeat(self):
+        if self._heartbeat_thread is not None:
+            return
+        self._stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name=f"heartbeat-{self.node_id}", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def stop_heartbeat(self):
+        self._stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            self.heartbeat()
+
+    def heartbeat(self):
+        """Refresh the lease on every claim this node holds."""
+        with self._held_lock:
+            held = list(self._held)
+        for task in held:
+            if not self._owns_task(task):
+                logger.warning(f"Node {self.node_id} lost claim {task}")
+                self._forget(task)
+                continue
+            try:
+                os.utime(self._claim_path(task))
+            except FileNotFoundError:
+                logger.warning(f"Node {self.node_id} lost claim {task}")
+                self._forget(task)
+        try:
+            (self.nodes_dir / self.node_id).touch()
+        except OSError as e:
+            logger.warning(f"Heartbeat failed for node {self.node_id}: {e}")
+
+    def shard_paths(self):
+        """Per-node log and metadata shard files."""
+        return (
+            self.shards_dir / f"{self.node_id}.log.csv",
+            self.shards_dir / f"{self.node_id}.metadata.csv",
+        )
+
+    def append_shards(self, log_rows, metadata_rows):
+        """Append this node's rows for a finished task to its shards."""
+        log_shard, metadata_shard = self.shard_paths()
+        finished_at = time.time()
+        for rows, shard in ((log_rows, log_shard), (metadata_rows, metadata_shard)):
+            if rows is None or rows.empty:
+                continue
+            rows = rows.assign(node_id=self.node_id, finished_at=finished_at)
+            rows.to_csv(shard, mode="a", header=not shard.exists(), index=False)
+
+
+def merge_shards(queue_dir, log_file=None, metadata_csv=None):
+    """Combine every node's shards into the final log and metadata CSVs.
+
+    A task that was reclaimed from a dead node can appear in more than one
+    shard; the most recently finished row for each video wins.
+    """
+    shards_dir = Path(queue_dir) / "shards"
+    merged = {}
+    for suffix, target in ((".log.csv", log_file), (".metadata.csv", metadata_csv)):
+        frames = [
+            pd.read_csv(shard)
+            for shard in sorted(shards_dir.glob(f"*{suffix}"))
+            if shard.stat().st_size > 0
+        ]
+        if not frames:
+            continue
+        df = pd.concat(frames, ignore_index=True)
+        df = (
+            df.sort_values("finished_at", kind="stable")
+            .drop_duplicates(subset="video_path", keep="last")
+            .drop(columns=["node_id", "finished_at"])
+            .reset_index(drop=True)
+        )
+        merged[suffix] = df
+        if target:
+            df.to_csv(target, index=False)
+            logger.info(f"Merged {len(frames)} shard(s) into {target}")
+    return merged.get(".log.csv"), merged.get(".metadata.csv")
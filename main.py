@@ -3,10 +3,18 @@
 __author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
 
 # Standard library imports
+import json
+import os
+import re
 import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Union
+from typing import Iterator, List, Optional, Dict, Tuple, Union
 
 # Third-party imports
 import pandas as pd
@@ -24,11 +32,77 @@ from config.defaults import (
     DEFAULT_FFMPEG_PATH,
     DEFAULT_FRAME_PATTERN,
     DEFAULT_OVERWRITE,
+    DEFAULT_SKIP_EXISTING,
     DEFAULT_MAINTAIN_STRUCTURE,
     DEFAULT_LOG_FILE,
     DEFAULT_METADATA_CSV,
+    DEFAULT_QUEUE_DIR,
+    DEFAULT_LEASE_TIMEOUT,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_QUEUE_POLL_INTERVAL,
+    DEFAULT_SAMPLING_MODE,
+    DEFAULT_SAMPLE_FPS,
+    DEFAULT_SCENE_THRESHOLD,
+    DEFAULT_COMPRESSION_LEVEL,
+    DEFAULT_FSYNC_POLICY,
+    DEFAULT_DEDUP_STORE,
+    DEFAULT_FFMPEG_TIMEOUT_FACTOR,
+    DEFAULT_FFMPEG_MIN_TIMEOUT,
+    DEFAULT_FFMPEG_STALL_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_QUARANTINE_CSV,
+    DEFAULT_SEGMENTS,
+    DEFAULT_MIN_SEGMENT_DURATION,
+    DEFAULT_QUALITY_WIDTH,
+    DEFAULT_PARQUET_DIR,
+    DEFAULT_PROBE_WORKERS,
+    DEFAULT_ESTIMATE_SPEED,
+)
+from lib.sampling import build_sampling_args, sampling_window
+from lib.segmenting import plan_segments, probe_keyframes
+from lib.video_probe import probe_video, probe_videos
+from lib.frame_quality import (
+    FrameScorer,
+    passes_thresholds,
+    scaled_size,
+    summarize,
+)
+from lib.ffmpeg_supervisor import (
+    FALLBACK_INPUT_ARGS,
+    FFmpegSupervisor,
+    FFmpegTimeoutError,
+)
+from lib.output_formats import (
+    RAW_FRAMES_FILE,
+    RAW_HEADER_FILE,
+    frame_glob,
+    get_output_profile,
+    load_raw_frames,
+    parse_output_size,
+    resolve_frame_pattern,
+    write_raw_header,
 )
 from lib.video_filename_parser import parse_video_filename
+from lib.output_staging import (
+    FSYNC_POLICIES,
+    abort_staging,
+    commit_staging,
+    prepare_staging,
+    sync_filesystems,
+)
+from lib.frame_store import FrameStore, extraction_key, hash_file
+from lib.frame_tensor import TENSOR_FILE, FrameTensorReader, FrameTensorWriter
+from lib.work_queue import ClaimLostError, WorkQueue, merge_shards
+from lib.parquet_store import append_run, compact as compact_parquet
+from lib.run_profiler import RunProfiler
+from lib.results import (
+    DEDUPLICATED,
+    FAILED,
+    SKIPPED,
+    SUCCESS,
+    FrameResult,
+    VideoResult,
+)
 
 # Configure logging
 logger = setup_logger(
@@ -37,6 +111,8 @@ logger = setup_logger(
     console_level=20,
 )
 
+SHOWINFO_PTS_RE = re.compile(r"pts_time:\s*(-?[\d.]+)")
+
 
 @dataclass
 class Config:
@@ -46,20 +122,118 @@ class Config:
     output_root: Optional[Path] = DEFAULT_OUTPUT_ROOT
     ffmpeg_path: Path = DEFAULT_FFMPEG_PATH
     threads: int = DEFAULT_THREADS
+    # Scheduling priority increment for FFmpeg children (POSIX only)
+    ffmpeg_nice: int = 0
+    # Supervision: deadline = max(min_timeout, duration * factor); stall = no progress
+    ffmpeg_timeout_factor: float = DEFAULT_FFMPEG_TIMEOUT_FACTOR
+    ffmpeg_min_timeout: float = DEFAULT_FFMPEG_MIN_TIMEOUT
+    ffmpeg_stall_timeout: float = DEFAULT_FFMPEG_STALL_TIMEOUT
+    max_retries: int = DEFAULT_MAX_RETRIES
+    quarantine_csv: Optional[Path] = DEFAULT_QUARANTINE_CSV
+    retry_quarantined: bool = False
+    # Split each long video at keyframes into this many parallel FFmpeg runs
+    segments: int = DEFAULT_SEGMENTS
+    min_segment_duration: float = DEFAULT_MIN_SEGMENT_DURATION
+    # Probe all inputs first: reject invalid ones, process longest first, estimate
+    probe_inputs: bool = True
+    probe_workers: int = DEFAULT_PROBE_WORKERS
+    estimate_speed: float = DEFAULT_ESTIMATE_SPEED
+    # Frame quality metrics in the metadata CSV; any threshold enables scoring
+    quality_scoring: bool = False
+    quality_width: int = DEFAULT_QUALITY_WIDTH
+    quality_workers: Optional[int] = None
+    min_sharpness: Optional[float] = None
+    min_brightness: Optional[float] = None
+    max_brightness: Optional[float] = None
+    max_clipped: Optional[float] = None
+    min_motion: Optional[float] = None
     frame_pattern: str = DEFAULT_FRAME_PATTERN
     output_format: str = DEFAULT_FORMAT
     video_extensions: List[str] = field(default_factory=lambda: VALID_EXTENSIONS)
     quality: int = DEFAULT_QUALITY
+    # Encoder effort: PNG 0-9, WebP 0-6; None uses the profile default
+    compression_level: Optional[int] = DEFAULT_COMPRESSION_LEVEL
+    # With output_format="tensor": one file for the whole run instead of per video
+    tensor_file: Optional[Path] = None
+    # Which frames to extract and from which part of the video
+    sampling_mode: str = DEFAULT_SAMPLING_MODE
+    sample_fps: float = DEFAULT_SAMPLE_FPS
+    scene_threshold: float = DEFAULT_SCENE_THRESHOLD
+    timestamps: List[float] = field(default_factory=list)
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
     overwrite: bool = DEFAULT_OVERWRITE
+    # Keep videos that already have output instead of extracting them again;
+    # off by default, since earlier versions always re-ran FFmpeg
+    skip_existing: bool = DEFAULT_SKIP_EXISTING
+    # Content-addressed frame store shared by duplicate videos; None disables
+    dedup_store: Optional[Path] = DEFAULT_DEDUP_STORE
+    # Durability of committed frames: none, video (fsync each video) or run (sync at end)
+    fsync_policy: str = DEFAULT_FSYNC_POLICY
     maintain_structure: bool = DEFAULT_MAINTAIN_STRUCTURE
     use_parent_dir: bool = False
     web_mode: bool = False
     log_file: Optional[Path] = DEFAULT_LOG_FILE
     metadata_csv: Optional[Path] = DEFAULT_METADATA_CSV
+    # Write a profiling report (stage times, FFmpeg resource usage, cProfile) here
+    profile_dir: Optional[Path] = None
+    # Append log and metadata to partitioned Parquet datasets (needs pyarrow)
+    parquet_dir: Optional[Path] = DEFAULT_PARQUET_DIR
+    compact_parquet: bool = False
+    # Distributed mode: nodes sharing queue_dir split the input tree between them
+    queue_dir: Optional[Path] = DEFAULT_QUEUE_DIR
+    node_id: Optional[str] = None
+    lease_timeout: float = DEFAULT_LEASE_TIMEOUT
+    heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL
+    queue_poll_interval: float = DEFAULT_QUEUE_POLL_INTERVAL
+    merge_shards: bool = False
+
+
+def format_seconds(seconds: float) -> str:
+    """Human-readable duration for progress and estimate messages."""
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def ffmpeg_failure(error: Exception) -> str:
+    """Short description of a failed FFmpeg run, without the full command line."""
+    if isinstance(error, subprocess.CalledProcessError):
+        return f"exit status {error.returncode}: {error.stderr or 'no diagnostics'}"
+    return str(error)
+
+
+def extraction_params(cfg: Config) -> Dict:
+    """Settings that change the extracted frames, for content-addressed keys."""
+    params = {
+        "sampling_mode": cfg.sampling_mode,
+        "sample_fps": cfg.sample_fps,
+        "scene_threshold": cfg.scene_threshold,
+        "timestamps": sorted(cfg.timestamps),
+        "start_time": cfg.start_time,
+        "end_time": cfg.end_time,
+        "output_format": cfg.output_format,
+        "quality": cfg.quality,
+        "compression_level": cfg.compression_level,
+        "frame_pattern": resolve_frame_pattern(cfg.frame_pattern, cfg.output_format),
+    }
+    thresholds = [
+        cfg.min_sharpness,
+        cfg.min_brightness,
+        cfg.max_brightness,
+        cfg.max_clipped,
+        cfg.min_motion,
+    ]
+    if any(limit is not None for limit in thresholds):
+        # Thresholds decide which frames are kept, judged at the scoring width
+        params["quality_thresholds"] = [*thresholds, cfg.quality_width]
+    return params
 
 
 class FrameExtractor:
-    """Extract I-frames from videos using FFmpeg."""
+    """Extract frames (I-frames by default) from videos using FFmpeg."""
 
     def __init__(self, cfg: Config):
         self.cfg = cfg
@@ -75,6 +249,80 @@ class FrameExtractor:
         )
         self.metadata_df = pd.DataFrame()
 
+        # Fail early on invalid sampling settings rather than once per video
+        build_sampling_args(cfg)
+        # Each retry moves one step down the fallback ladder, which has no more rungs
+        if not 0 <= cfg.max_retries < len(FALLBACK_INPUT_ARGS):
+            raise ValueError(
+                f"max_retries must be between 0 and {len(FALLBACK_INPUT_ARGS) - 1}, "
+                f"got {cfg.max_retries}"
+            )
+        self.output_profile = get_output_profile(cfg.output_format)
+        self._tensor_writer = None
+        self.frame_store = FrameStore(cfg.dedup_store) if cfg.dedup_store else None
+        # Quality scoring; thresholds remove failing frames from image outputs
+        self.quality_thresholds = [
+            (metric, op, limit)
+            for metric, op, limit in (
+                ("sharpness", "min", cfg.min_sharpness),
+                ("brightness", "min", cfg.min_brightness),
+                ("brightness", "max", cfg.max_brightness),
+                ("clipped", "max", cfg.max_clipped),
+                ("motion", "min", cfg.min_motion),
+            )
+            if limit is not None
+        ]
+        self.frame_scorer = None
+        if cfg.quality_scoring or self.quality_thresholds:
+            if self.output_profile.get("pipe"):
+                logger.warning("Quality scoring is not supported for tensor output")
+                self.quality_thresholds = []
+            else:
+                self.frame_scorer = FrameScorer(cfg.quality_workers)
+                if self.quality_thresholds and self.output_profile["single_file"]:
+                    logger.warning(
+                        "Quality thresholds only filter image outputs; raw frames "
+                        "are scored but kept"
+                    )
+                    self.quality_thresholds = []
+
+        self.profiler = None
+        if cfg.profile_dir:
+            self.profiler = RunProfiler(cfg.profile_dir)
+            self.profiler.start()
+
+        # Segmented extraction needs a policy whose frames do not depend on
+        # their neighbours, and one output file per frame
+        self.segmentable = cfg.segments > 1
+        if self.segmentable and (
+            cfg.sampling_mode != "iframe" or self.output_profile["single_file"]
+        ):
+            logger.warning(
+                "segments > 1 is only supported for iframe sampling with image "
+                "output; videos will be extracted by a single FFmpeg process"
+            )
+            self.segmentable = False
+        # Pre-flight probe results by video path, filled by process_directory
+        self.probes = {}
+        # Distributed mode: returns False once another node has taken the video over,
+        # and the node id that keeps this node's staging directories apart
+        self.claim_check = None
+        self.node_id = None
+        # extract_video may run on several threads at once
+        self._records_lock = threading.Lock()
+        self._tensor_lock = threading.Lock()
+        self.supervisor = FFmpegSupervisor(
+            timeout_factor=cfg.ffmpeg_timeout_factor,
+            min_timeout=cfg.ffmpeg_min_timeout,
+            stall_timeout=cfg.ffmpeg_stall_timeout,
+            nice=cfg.ffmpeg_nice,
+        )
+        if cfg.fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Unknown fsync_policy '{cfg.fsync_policy}'. "
+                f"Available: {', '.join(FSYNC_POLICIES)}"
+            )
+
         if cfg.use_parent_dir and cfg.input_path.is_file():
             self.cfg.output_root = cfg.input_path.parent
             logger.info(f"Using parent directory as output: {self.cfg.output_root}")
@@ -84,7 +332,7 @@ class FrameExtractor:
 
         logger.info("Initialized FrameExtractor with config: %s", self.cfg)
 
-    def create_output_structure(self, video_path: Path) -> Path:
+    def create_output_structure(self, video_path: Path, create: bool = True) -> Path:
         try:
             if self.cfg.use_parent_dir:
                 output_dir = video_path.parent / video_path.stem
@@ -101,37 +349,92 @@ class FrameExtractor:
                 else:
                     output_dir = self.cfg.output_root / video_path.stem
 
-            output_dir.mkdir(parents=True, exist_ok=True)
+            if create:
+                output_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                output_dir.parent.mkdir(parents=True, exist_ok=True)
             return output_dir
         except Exception as e:
             logger.warning(
                 f"Error creating output structure: {e}. Using fallback path."
             )
             fallback_dir = self.cfg.output_root / video_path.stem
-            fallback_dir.mkdir(parents=True, exist_ok=True)
+            if create:
+                fallback_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                fallback_dir.parent.mkdir(parents=True, exist_ok=True)
             return fallback_dir
 
-    def build_ffmpeg_command(self, input_path: Path, output_dir: Path) -> List[str]:
+    def _frame_pattern(self, warn: bool = False) -> str:
         frame_pattern = self.cfg.frame_pattern
         if "%d" not in frame_pattern and "%0" not in frame_pattern:
-            frame_pattern = f"frame_%03d.{self.cfg.output_format}"
-            logger.warning(f"Using default frame pattern: {frame_pattern}")
+            frame_pattern = f"frame_%03d.{self.output_profile['extension']}"
+            if warn:
+                logger.warning(f"Using default frame pattern: {frame_pattern}")
+        return resolve_frame_pattern(frame_pattern, self.cfg.output_format)
+
+    def build_ffmpeg_command(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        extra_input_args: List[str] = (),
+        window: Optional[tuple] = None,
+        threads: Optional[int] = None,
+        score_width: Optional[int] = None,
+    ) -> List[str]:
+        """FFmpeg command extracting one video (or one ``window`` of it).
+
+        With ``score_width`` the selected frames are also split into a second
+        output on stdout, downscaled to that width and converted to gray, for
+        quality scoring without decoding the written images again.
+        """
+        profile = self.output_profile
+        if profile.get("pipe"):
+            output_target = "pipe:1"
+            muxer_args = []
+        elif profile["single_file"]:
+            output_target = output_dir / RAW_FRAMES_FILE
+            muxer_args = []
+        else:
+            output_target = output_dir / self._frame_pattern(warn=True)
+            muxer_args = ["-f", "image2"]
+
+        input_args, video_filter = build_sampling_args(self.cfg, window)
+        # showinfo reports each selected frame's PTS for the results and tensor index
+        video_filter += ",showinfo=checksum=0"
+        if profile.get("pipe"):
+            if self._tensor_writer and self._tensor_writer.frame_size:
+                # Frames in one tensor file must share a size
+                width, height = self._tensor_writer.frame_size
+                video_filter += f",scale={width}:{height}"
+
+        filter_args = ["-vf", video_filter]
+        score_args = []
+        if score_width:
+            filter_args = [
+                "-filter_complex",
+                f"[0:v:0]{video_filter},split=2[frames][score];"
+                f"[score]scale='min(iw,{score_width})':-2:flags=area,format=gray[gray]",
+                "-map",
+                "[frames]",
+            ]
+            score_args = ["-map", "[gray]", "-f", "rawvideo", "pipe:1"]
 
         cmd = [
             str(self.cfg.ffmpeg_path),
+            *extra_input_args,
+            *input_args,
             "-i",
             str(input_path),
             "-threads",
-            str(self.cfg.threads),
-            "-vf",
-            "select='eq(pict_type,I)'",
+            str(threads or self.cfg.threads),
+            *filter_args,
             "-vsync",
             "vfr",
-            "-q:v",
-            str(self.cfg.quality),
-            "-f",
-            "image2",
-            str(output_dir / frame_pattern),
+            *profile["codec_args"](self.cfg, self.cfg.compression_level),
+            *muxer_args,
+            str(output_target),
+            *score_args,
         ]
 
         if self.cfg.overwrite:
@@ -142,14 +445,83 @@ class FrameExtractor:
     def process_video(
         self, video_path: Path, progress_callback=None
     ) -> Optional[List[str]]:
+        """CLI/web wrapper: frame paths relative to the output root in web mode."""
+        result = self.extract_video(video_path, progress_callback)
+        return self.web_frame_paths(result) if self.cfg.web_mode else None
+
+    def web_frame_paths(self, result: VideoResult) -> List[str]:
+        """Image paths of a result relative to the output root, as the web serves them."""
+        if not result.ok or self.output_profile["single_file"]:
+            return []
+        return self._web_frame_paths(
+            result.output_dir, [frame.path.name for frame in result.frames]
+        )
+
+    def extract_video(self, video_path: Path, progress_callback=None) -> VideoResult:
+        """Extract one video and describe the outcome; never raises for a bad input.
+
+        Safe to call from several threads at once on the same extractor.
+        """
+        with self.profiler.profile_thread() if self.profiler else nullcontext():
+            if self.output_profile.get("pipe") and self.cfg.tensor_file:
+                # Videos are appended to the run's tensor file one at a time
+                with self._tensor_lock:
+                    return self._extract_video(Path(video_path), progress_callback)
+            return self._extract_video(Path(video_path), progress_callback)
+
+    def extract_videos(self, video_paths, executor=None) -> Iterator[VideoResult]:
+        """Extract several videos, yielding each result as it completes.
+
+        With an ``executor`` (e.g. a thread pool shared with the rest of a
+        service) the videos run concurrently on it; otherwise they run one
+        after another in the calling thread. Process pools are not supported,
+        as the extractor itself is not picklable. Call ``finish_run`` once the
+        batch is done.
+        """
+        if executor is None:
+            for video_path in video_paths:
+                yield self.extract_video(video_path)
+            return
+        futures = [executor.submit(self.extract_video, p) for p in video_paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def _extract_video(self, video_path: Path, progress_callback=None) -> VideoResult:
         output_dir = None
         frame_count = 0
-        frame_paths = []
+        tensor_writer = None
+        staging_dir = None
 
         def update_progress(percent):
             if progress_callback:
                 progress_callback.update(percent, 100)
 
+        # Wall time per stage for the result, also booked by the profiler
+        timings = {}
+        profiler_lap = self.profiler.laps(video_path) if self.profiler else None
+        last_lap = time.perf_counter()
+
+        def lap(stage):
+            nonlocal last_lap
+            now = time.perf_counter()
+            timings[stage] = timings.get(stage, 0.0) + now - last_lap
+            last_lap = now
+            if profiler_lap is not None:
+                profiler_lap(stage)
+
+        # Optional hook: receives frame paths as soon as FFmpeg has finished them
+        frames_written = getattr(progress_callback, "frames_written", None)
+        published = 0
+
+        def publish_frames(up_to):
+            nonlocal published
+            if frames_written is None or up_to <= published:
+                return
+            frame_pattern = self._frame_pattern()
+            names = [frame_pattern % i for i in range(published + 1, up_to + 1)]
+            frames_written(self._web_frame_paths(output_dir, names))
+            published = up_to
+
         try:
             metadata = parse_video_filename(video_path.name)
             emotion = metadata.get("emotion_full", "unknown")
@@ -160,89 +532,636 @@ class FrameExtractor:
             )
             update_progress(10)
 
-            # Clear any existing output directory if in web mode and overwrite enabled
-            output_dir = self.create_output_structure(video_path)
-            if self.cfg.web_mode and self.cfg.overwrite and output_dir.exists():
-                for existing_file in output_dir.glob(f"*.{self.cfg.output_format}"):
-                    try:
-                        existing_file.unlink()
-                        logger.debug(f"Removed old frame: {existing_file}")
-                    except Exception as e:
-                        logger.warning(
-                            f"Failed to remove old frame {existing_file}: {e}"
-                        )
+            run_tensor = self.output_profile.get("pipe") and self.cfg.tensor_file
+            output_dir = self.create_output_structure(video_path, create=False)
+            if (
+                self.cfg.skip_existing
+                and not self.cfg.overwrite
+                and not run_tensor
+                and output_dir.is_dir()
+                and any(output_dir.iterdir())
+            ):
+                return self._skip_existing(video_path, output_dir, metadata)
+
+            # Frames are written to a staging directory and committed with a rename,
+            # so a previous output is replaced without deleting it frame by frame
+            if not run_tensor:
+                staging_dir = prepare_staging(output_dir, self.node_id)
+
+            dedup_key = dedup_info = None
+            if self.frame_store is not None and not run_tensor:
+                dedup_key = extraction_key(
+                    hash_file(video_path), extraction_params(self.cfg)
+                )
+                manifest = self.frame_store.lookup(dedup_key)
+                # An entry extracted without scoring cannot supply quality columns
+                if self.frame_scorer is not None and manifest is not None:
+                    if manifest.get("quality") is None:
+                        manifest = None
+                if manifest is not None:
+                    result = self._reuse_stored_frames(
+                        video_path, output_dir, staging_dir, metadata, manifest
+                    )
+                    lap("commit")
+                    result.timings = timings
+                    return result
+                dedup_info = {"content_key": dedup_key, "duplicate_of": None}
+
+            pipe_output = self.output_profile.get("pipe", False)
+            if pipe_output:
+                tensor_writer = self._get_tensor_writer(staging_dir)
 
-            cmd = self.build_ffmpeg_command(video_path, output_dir)
             update_progress(20)
+            lap("prepare")
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-            )
+            # Long videos can be split at keyframes and decoded in parallel
+            segments = None
+            if self.segmentable:
+                segments = self._plan_segments(video_path)
 
-            # Improved progress tracking for FFmpeg
-            for line in process.stderr:
-                if "frame=" in line:
-                    try:
-                        # Attempt to parse progress from FFmpeg output
-                        frame_info = line.strip().split("frame=")[1].split()[0].strip()
-                        if frame_info.isdigit():
-                            progress = min(20 + int(int(frame_info) / 10), 90)
-                            update_progress(progress)
-                    except Exception:
-                        # Fallback if we can't parse the frame number
-                        update_progress(50)
-
-            process.wait()
-
-            if process.returncode != 0:
-                raise subprocess.CalledProcessError(process.returncode, cmd)
-
-            frame_files = list(output_dir.glob(f"*.{self.cfg.output_format}"))
-            frame_count = len(frame_files)
-
-            if self.cfg.web_mode:
-                # Fix: Convert absolute paths to relative paths for web interface
-                output_dir_str = str(output_dir)
-                frame_paths = []
-                for f in frame_files:
-                    # Create a path relative to the output root for web display
-                    if self.cfg.output_root and str(f).startswith(
-                        str(self.cfg.output_root)
-                    ):
-                        rel_path = str(f.relative_to(self.cfg.output_root))
+            def on_frames(encoded_frames):
+                update_progress(min(20 + int(encoded_frames / 10), 90))
+                # Frames may still be dropped by the quality thresholds at the end
+                if (
+                    not self.output_profile["single_file"]
+                    and not self.quality_thresholds
+                ):
+                    # The newest image may still be open; earlier ones are done
+                    publish_frames(encoded_frames - 1)
+
+            # Image outputs are scored from a gray copy made by the same FFmpeg run
+            score_width = None
+            if self.frame_scorer is not None and not self.output_profile["single_file"]:
+                score_width = self.cfg.quality_width
+
+            # Retry failed or stuck runs with progressively more tolerant flags
+            attempts = FALLBACK_INPUT_ARGS[: self.cfg.max_retries + 1]
+            for attempt, fallback_args in enumerate(attempts, 1):
+                try:
+                    if segments:
+                        header_lines, frame_pts, encoded_frames = self._run_segmented(
+                            video_path,
+                            staging_dir,
+                            segments,
+                            fallback_args,
+                            update_progress,
+                        )
+                        scores = None
                     else:
-                        # Fallback to just the filename if we can't create relative path
-                        rel_path = str(output_dir.name) + "/" + f.name
-                    frame_paths.append(rel_path)
+                        start, window = sampling_window(self.cfg)
+                        cmd = self.build_ffmpeg_command(
+                            video_path,
+                            staging_dir or output_dir,
+                            fallback_args,
+                            score_width=score_width,
+                        )
+                        header_lines, frame_pts, encoded_frames, scores = (
+                            self._run_ffmpeg(
+                                video_path,
+                                cmd,
+                                tensor_writer,
+                                on_frames,
+                                window,
+                                start or 0.0,
+                                score=score_width is not None,
+                            )
+                        )
+                    break
+                except (subprocess.CalledProcessError, FFmpegTimeoutError) as e:
+                    if attempt == len(attempts):
+                        # The new owner may have moved the staging directory away
+                        self._check_claim(video_path)
+                        self._quarantine(video_path, e, attempt)
+                        raise
+                    logger.warning(
+                        f"FFmpeg attempt {attempt} failed for {video_path.name}: "
+                        f"{ffmpeg_failure(e)}; retrying with "
+                        f"{' '.join(attempts[attempt])}"
+                    )
+                    # Start the next attempt from a clean slate
+                    if run_tensor:
+                        tensor_writer.abort_video()
+                    elif tensor_writer is not None:
+                        tensor_writer.discard()
+                    if staging_dir is not None:
+                        self._check_claim(video_path)
+                        staging_dir = prepare_staging(output_dir, self.node_id)
+                    if pipe_output and not run_tensor:
+                        tensor_writer = self._get_tensor_writer(staging_dir)
 
-                # Sort frames by name to ensure correct order
-                frame_paths.sort()
+            frame_names = []
+            output_files = []
+            size = parse_output_size(header_lines)
+            if self.output_profile["single_file"]:
+                if size is None:
+                    raise RuntimeError(
+                        "Could not determine output frame size from FFmpeg"
+                    )
+                if pipe_output:
+                    frame_count = tensor_writer.end_video(
+                        video_path, *size, pts=frame_pts, metadata=metadata
+                    )
+                    if tensor_writer is not self._tensor_writer:
+                        tensor_writer.close()
+                        output_files = [TENSOR_FILE]
+                    frames_file = (
+                        self.cfg.tensor_file if run_tensor else output_dir / TENSOR_FILE
+                    )
+                else:
+                    frame_count = write_raw_header(staging_dir, *size)
+                    output_files = [RAW_FRAMES_FILE, RAW_HEADER_FILE]
+                    frames_file = output_dir / RAW_FRAMES_FILE
+                frame_files = [Path(frames_file)] * frame_count
+            else:
+                # FFmpeg's final stats line gives the number of images it wrote,
+                # which avoids listing the directory again
+                frame_count = encoded_frames
+                frame_pattern = self._frame_pattern()
+                frame_names = [frame_pattern % i for i in range(1, frame_count + 1)]
+                output_files = frame_names
+
+            lap("extract")
+
+            quality_info = None
+            if self.frame_scorer is not None and frame_count:
+                if scores is None:
+                    scores = self._score_frames(video_path, staging_dir, header_lines)
+                keep = None
+                if self.quality_thresholds and frame_names:
+                    keep = passes_thresholds(scores, self.quality_thresholds)
+                    frame_names = self._drop_frames(staging_dir, frame_names, keep)
+                    if len(frame_pts) == len(keep):
+                        frame_pts = [pts for pts, k in zip(frame_pts, keep) if k]
+                    output_files = frame_names
+                    frame_count = len(frame_names)
+                quality_info = summarize(scores, keep)
+                lap("quality")
 
-            logger.info(f"Extracted {frame_count} I-frames from {video_path.name}")
+            if staging_dir is not None:
+                self._check_claim(video_path)
+                commit_staging(
+                    staging_dir, output_dir, fsync=self.cfg.fsync_policy == "video"
+                )
+                staging_dir = None
+
+            if dedup_key is not None:
+                self.frame_store.publish(
+                    dedup_key,
+                    output_dir,
+                    output_files,
+                    video_path,
+                    frame_count,
+                    quality_info,
+                )
+
+            lap("commit")
+
+            if not self.output_profile["single_file"]:
+                frame_files = [output_dir / name for name in frame_names]
+            if self.quality_thresholds:
+                if frames_written is not None and frame_names:
+                    frames_written(self._web_frame_paths(output_dir, frame_names))
+            elif frame_names:
+                publish_frames(len(frame_names))
+
+            logger.info(f"Extracted {frame_count} frames from {video_path.name}")
             update_progress(100)
 
             self._update_log(
                 video_path, frame_count, output_dir, "success", metadata=metadata
             )
-            self._update_metadata(video_path, metadata, frame_count)
+            probe = self.probes.get(str(video_path))
+            self._update_metadata(
+                video_path,
+                metadata,
+                frame_count,
+                {
+                    **(probe.summary() if probe else {}),
+                    **(dedup_info or {}),
+                    **(quality_info or {}),
+                },
+            )
+            lap("bookkeeping")
 
-            return frame_paths if self.cfg.web_mode else None
+            return VideoResult(
+                video_path,
+                SUCCESS,
+                output_dir,
+                self._frame_results(frame_files, frame_pts, size),
+                metadata,
+                timings,
+            )
 
         except Exception as e:
             error_type = (
-                "FFmpeg error"
-                if isinstance(e, subprocess.CalledProcessError)
-                else "Error"
+                "FFmpeg error" if isinstance(e, subprocess.SubprocessError) else "Error"
             )
             logger.error(f"{error_type} processing {video_path}: {e}")
+            if tensor_writer is not None:
+                if tensor_writer is self._tensor_writer:
+                    tensor_writer.abort_video()
+                else:
+                    tensor_writer.discard()
+            # After a lost claim the staging directory is the new owner's
+            if staging_dir is not None and not isinstance(e, ClaimLostError):
+                abort_staging(staging_dir)
             self._update_log(video_path, frame_count, output_dir, "failed", str(e))
 
-            return [] if self.cfg.web_mode else None
+            return VideoResult(
+                video_path,
+                FAILED,
+                output_dir,
+                timings=timings,
+                error=ffmpeg_failure(e),
+            )
+
+    @staticmethod
+    def _frame_results(
+        frame_files: List[Path], frame_pts=None, size=None
+    ) -> List[FrameResult]:
+        width, height = size or (None, None)
+        if not frame_pts or len(frame_pts) != len(frame_files):
+            frame_pts = [None] * len(frame_files)
+        return [
+            FrameResult(index, path, pts, width, height)
+            for index, (path, pts) in enumerate(zip(frame_files, frame_pts))
+        ]
+
+    def _check_claim(self, video_path: Path):
+        """Stop before touching shared output once another node owns the video."""
+        if self.claim_check is not None and not self.claim_check(video_path):
+            raise ClaimLostError(f"{video_path.name} was reclaimed by another node")
+
+    def _web_frame_paths(self, output_dir: Path, frame_names: List[str]) -> List[str]:
+        """Frame paths relative to the output root, as the web interface serves them."""
+        try:
+            base = output_dir.relative_to(self.cfg.output_root)
+        except (TypeError, ValueError):
+            # Fallback to the directory name if we can't create a relative path
+            base = Path(output_dir.name)
+        return sorted((base / name).as_posix() for name in frame_names)
+
+    def _reuse_stored_frames(
+        self,
+        video_path: Path,
+        output_dir: Path,
+        staging_dir: Path,
+        metadata: Dict,
+        manifest: Dict,
+    ):
+        """Link the frames of an already extracted duplicate instead of running FFmpeg."""
+        files = self.frame_store.link_into(manifest["key"], staging_dir, manifest)
+        self._check_claim(video_path)
+        commit_staging(staging_dir, output_dir, fsync=self.cfg.fsync_policy == "video")
+        frame_count = manifest["frame_count"]
+        logger.info(
+            f"Reused {frame_count} frames for {video_path.name} "
+            f"(duplicate of {manifest['source']})"
+        )
+
+        self._update_log(
+            video_path, frame_count, output_dir, "deduplicated", metadata=metadata
+        )
+        probe = self.probes.get(str(video_path))
+        self._update_metadata(
+            video_path,
+            metadata,
+            frame_count,
+            {
+                **(probe.summary() if probe else {}),
+                "content_key": manifest["key"],
+                "duplicate_of": manifest["source"],
+                **(manifest.get("quality") or {}),
+            },
+        )
+        if self.output_profile["single_file"]:
+            frame_files = [output_dir / files[0]] * frame_count
+        else:
+            frame_files = [output_dir / name for name in files]
+        return VideoResult(
+            video_path,
+            DEDUPLICATED,
+            output_dir,
+            self._frame_results(frame_files),
+            metadata,
+        )
+
+    def _skip_existing(self, video_path: Path, output_dir: Path, metadata: Dict):
+        """Keep a previously committed output when ``skip_existing`` is set."""
+        frame_files = self._existing_frames(output_dir)
+        logger.info(f"Skipping {video_path.name}: output exists at {output_dir}")
+        self._update_log(
+            video_path, len(frame_files), output_dir, "skipped", metadata=metadata
+        )
+        probe = self.probes.get(str(video_path))
+        self._update_metadata(
+            video_path, metadata, len(frame_files), probe.summary() if probe else None
+        )
+        return VideoResult(
+            video_path, SKIPPED, output_dir, self._frame_results(frame_files), metadata
+        )
+
+    def _existing_frames(self, output_dir: Path) -> List[Path]:
+        """Frames of a committed output, counted from its header for single files."""
+        if not self.output_profile["single_file"]:
+            return sorted(output_dir.glob(frame_glob(self.cfg.output_format)))
+        try:
+            if self.output_profile.get("pipe"):
+                frames_file = output_dir / TENSOR_FILE
+                count = FrameTensorReader(frames_file).count
+            else:
+                frames_file = output_dir / RAW_FRAMES_FILE
+                with open(output_dir / RAW_HEADER_FILE) as f:
+                    count = json.load(f)["count"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read frame count in {output_dir}: {e}")
+            return []
+        return [frames_file] * count
+
+    def _get_tensor_writer(self, output_dir: Path) -> FrameTensorWriter:
+        """Shared writer for ``tensor_file`` runs, otherwise a per-video one."""
+        if not self.cfg.tensor_file:
+            return FrameTensorWriter(output_dir / TENSOR_FILE)
+        if self._tensor_writer is None:
+            self._tensor_writer = FrameTensorWriter(self.cfg.tensor_file)
+        return self._tensor_writer
+
+    def _run_ffmpeg(
+        self,
+        video_path: Path,
+        cmd: List[str],
+        tensor_writer: Optional[FrameTensorWriter],
+        on_frames,
+        expected_duration: Optional[float] = None,
+        pts_offset: float = 0.0,
+        score: bool = False,
+    ):
+        """Run one supervised FFmpeg attempt; returns (header lines, PTS, frames, scores).
+
+        ``on_frames`` is called with FFmpeg's running count of written frames.
+        With ``score`` the command's gray stdout output (see ``score_width`` of
+        ``build_ffmpeg_command``) is scored; otherwise scores are None.
+        """
+        header_lines = []
+        frame_pts = []
+        encoded_frames = 0
+        on_stdout = tensor_writer.write if tensor_writer else None
+        finish_scores = None
+        if score:
+            gray_size = None
+
+            def score_size():
+                nonlocal gray_size
+                if gray_size is None:
+                    gray_size = parse_output_size(list(header_lines), output=1)
+                return gray_size
+
+            on_stdout, finish_scores = self.frame_scorer.gray_stream(score_size)
+        # Latest diagnostics, without the per-frame showinfo lines that would
+        # otherwise bury FFmpeg's error message on a long run
+        diagnostics = deque(maxlen=10)
+
+        def on_line(line):
+            nonlocal encoded_frames
+            pts_match = SHOWINFO_PTS_RE.search(line)
+            if pts_match:
+                frame_pts.append(float(pts_match.group(1)) + pts_offset)
+            elif "Parsed_showinfo" in line:
+                return
+            elif "frame=" not in line:
+                # Stream descriptions are needed to size raw output
+                if len(header_lines) < 200:
+                    header_lines.append(line)
+                if line.strip() and not line.startswith("bench:"):
+                    diagnostics.append(line)
+            else:
+                # Attempt to parse progress from FFmpeg output
+                frame_info = line.strip().split("frame=")[1].split()
+                if frame_info and frame_info[0].isdigit():
+                    encoded_frames = int(frame_info[0])
+                    on_frames(encoded_frames)
+
+        returncode = self._supervise(
+            video_path,
+            "extract",
+            cmd,
+            on_line,
+            on_stdout=on_stdout,
+            expected_duration=expected_duration,
+        )
+        if returncode != 0:
+            # The last diagnostic line usually names the cause
+            raise subprocess.CalledProcessError(
+                returncode,
+                cmd,
+                stderr=diagnostics[-1].strip() if diagnostics else None,
+            )
+        scores = finish_scores() if finish_scores else None
+        return header_lines, frame_pts, encoded_frames, scores
+
+    def _supervise(
+        self, video_path: Path, stage: str, cmd: List[str], on_line, **kwargs
+    ):
+        """Run FFmpeg under the supervisor, recording its resource usage when profiling."""
+        if self.profiler is None:
+            return self.supervisor.run(cmd, on_line, **kwargs)
+        usage = {}
+        # FFmpeg reports its own CPU time and peak memory with -benchmark
+        cmd = [cmd[0], "-benchmark", *cmd[1:]]
+        try:
+            return self.supervisor.run(cmd, on_line, usage=usage, **kwargs)
+        finally:
+            self.profiler.record_child(video_path, stage, usage)
+
+    def _plan_segments(self, video_path: Path):
+        """Keyframe-aligned ``(start, end)`` segments, or None to use one process."""
+        probe = self.probes.get(str(video_path))
+        if probe is not None:
+            keyframes, duration = probe.keyframes, probe.duration
+        else:
+            try:
+                keyframes, duration = probe_keyframes(
+                    self.cfg.ffmpeg_path,
+                    video_path,
+                    timeout=self.cfg.ffmpeg_min_timeout,
+                )
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.warning(f"Could not list keyframes of {video_path.name}: {e}")
+                return None
+        segments = plan_segments(
+            keyframes,
+            duration,
+            self.cfg.segments,
+            self.cfg.start_time,
+            self.cfg.end_time,
+            self.cfg.min_segment_duration,
+        )
+        if len(segments) < 2:
+            return None
+        logger.info(f"Splitting {video_path.name} into {len(segments)} segments")
+        return segments
+
+    def _run_segmented(
+        self,
+        video_path: Path,
+        target_dir: Path,
+        segments,
+        extra_input_args: List[str],
+        update_progress,
+    ):
+        """Extract each segment with its own FFmpeg, then number frames globally."""
+        threads = max(1, self.cfg.threads // len(segments))
+        segment_dirs = [target_dir / f".segment_{i:03d}" for i in range(len(segments))]
+        counts = [0] * len(segments)
+        segment_pts = [[] for _ in segments]
+        header_lines = []
+        lock = threading.Lock()
+
+        def run_segment(index):
+            seg_start, seg_end = segments[index]
+            segment_dirs[index].mkdir()
+
+            def on_frames(encoded_frames):
+                with lock:
+                    counts[index] = encoded_frames
+                    total = sum(counts)
+                update_progress(min(20 + int(total / 10), 90))
+
+            cmd = self.build_ffmpeg_command(
+                video_path,
+                segment_dirs[index],
+                extra_input_args,
+                window=segments[index],
+                threads=threads,
+            )
+            expected = seg_end - (seg_start or 0.0) if seg_end is not None else None
+            lines, segment_pts[index], counts[index], _ = self._run_ffmpeg(
+                video_path, cmd, None, on_frames, expected, seg_start or 0.0
+            )
+            if index == 0:
+                # Stream descriptions are the same for every segment
+                header_lines.extend(lines)
+
+        with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+            futures = [pool.submit(run_segment, i) for i in range(len(segments))]
+        for future in futures:
+            future.result()
+
+        # Segments partition the frames in time order, so renumbering them
+        # consecutively reproduces the single-process sequence
+        frame_pattern = self._frame_pattern()
+        total = 0
+        for segment_dir, count in zip(segment_dirs, counts):
+            for number in range(1, count + 1):
+                os.rename(
+                    segment_dir / (frame_pattern % number),
+                    target_dir / (frame_pattern % (total + number)),
+                )
+            total += count
+            segment_dir.rmdir()
+        return header_lines, [pts for chunk in segment_pts for pts in chunk], total
+
+    def _score_frames(
+        self, video_path: Path, frames_dir: Path, header_lines: List[str]
+    ):
+        """Quality scores of frames already written, in frame order.
+
+        Used for raw output and segmented runs; single-process image runs
+        score the gray output of the extraction itself.
+        """
+        if self.output_profile["single_file"]:
+            return self.frame_scorer.score_array(
+                load_raw_frames(frames_dir), self.cfg.quality_width
+            )
+
+        size = parse_output_size(header_lines)
+        if size is None:
+            raise RuntimeError("Could not determine output frame size from FFmpeg")
+        width, height = scaled_size(*size, self.cfg.quality_width)
+        on_bytes, finish = self.frame_scorer.gray_stream(lambda: (width, height))
+        # Decode the images back once, already shrunk and converted to gray
+        cmd = [
+            str(self.cfg.ffmpeg_path),
+            "-f",
+            "image2",
+            "-i",
+            str(frames_dir / self._frame_pattern()),
+            "-vf",
+            f"scale={width}:{height}:flags=area,format=gray",
+            "-vsync",
+            "passthrough",
+            "-f",
+            "rawvideo",
+            "pipe:1",
+        ]
+        returncode = self._supervise(
+            video_path, "quality", cmd, lambda line: None, on_stdout=on_bytes
+        )
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        return finish()
+
+    @staticmethod
+    def _drop_frames(frames_dir: Path, frame_names: List[str], keep) -> List[str]:
+        """Delete frames that failed the quality thresholds; returns the kept names."""
+        kept = []
+        for name, keep_frame in zip(frame_names, keep):
+            if keep_frame:
+                kept.append(name)
+            else:
+                (frames_dir / name).unlink()
+        return kept
+
+    def _quarantine(self, video_path: Path, error: Exception, attempts: int):
+        """Record an input that failed every attempt so later runs can skip it."""
+        if not self.cfg.quarantine_csv:
+            return
+        entry = pd.DataFrame(
+            [
+                {
+                    "video_path": str(video_path),
+                    "error": ffmpeg_failure(error),
+                    "attempts": attempts,
+                    "quarantined_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+            ]
+        )
+        quarantine_csv = Path(self.cfg.quarantine_csv)
+        with self._records_lock:
+            entry.to_csv(
+                quarantine_csv,
+                mode="a",
+                header=not quarantine_csv.exists(),
+                index=False,
+            )
+        logger.error(f"Quarantined {video_path} after {attempts} failed attempts")
+
+    def _load_quarantine(self) -> set:
+        if not self.cfg.quarantine_csv or not Path(self.cfg.quarantine_csv).exists():
+            return set()
+        return set(pd.read_csv(self.cfg.quarantine_csv)["video_path"].astype(str))
+
+    def finish_run(self):
+        """Finalize run-level outputs: tensor file, end-of-run sync, profile report."""
+        self.close_tensor_file()
+        if self.frame_scorer is not None:
+            self.frame_scorer.shutdown()
+            self.frame_scorer = None
+        if self.cfg.fsync_policy == "run":
+            sync_filesystems()
+            logger.info("Flushed extracted frames to disk")
+        if self.profiler is not None:
+            self.profiler.write_report()
+            self.profiler = None
+
+    def close_tensor_file(self):
+        """Finalize the run-level tensor file, if one is being written."""
+        if self._tensor_writer is not None:
+            self._tensor_writer.close()
+            logger.info(
+                f"Wrote {self._tensor_writer.count} frames to {self.cfg.tensor_file}"
+            )
+            self._tensor_writer = None
 
     def _update_log(
         self, video_path, frame_count, output_dir, status, error=None, metadata=None
@@ -255,26 +1174,31 @@ class FrameExtractor:
             "error": error,
             "metadata": metadata,
         }
-        self.log_df = pd.concat(
-            [self.log_df, pd.DataFrame([new_entry])], ignore_index=True
-        )
+        with self._records_lock:
+            self.log_df = pd.concat(
+                [self.log_df, pd.DataFrame([new_entry])], ignore_index=True
+            )
 
-    def _update_metadata(self, video_path, metadata, frame_count):
+    def _update_metadata(self, video_path, metadata, frame_count, extra=None):
         metadata_entry = {
             "video_path": str(video_path),
             "frame_count": frame_count,
             **metadata,
+            **(extra or {}),
         }
-        self.metadata_df = pd.concat(
-            [self.metadata_df, pd.DataFrame([metadata_entry])], ignore_index=True
-        )
+        with self._records_lock:
+            self.metadata_df = pd.concat(
+                [self.metadata_df, pd.DataFrame([metadata_entry])], ignore_index=True
+            )
 
     def process_input(self) -> Optional[Union[List[str], Dict[str, List[str]]]]:
         logger.info(f"Processing input: {self.cfg.input_path}")
 
         if self.cfg.input_path.is_file():
             if self.cfg.input_path.suffix.lower() in self.cfg.video_extensions:
-                return self.process_video(self.cfg.input_path)
+                result = self.process_video(self.cfg.input_path)
+                self.finish_run()
+                return result
             else:
                 logger.warning(
                     f"Input file {self.cfg.input_path} is not a supported video format"
@@ -293,6 +1217,16 @@ class FrameExtractor:
             if p.suffix.lower() in self.cfg.video_extensions
         ]
 
+        if not self.cfg.retry_quarantined:
+            quarantined = self._load_quarantine()
+            skipped = [p for p in video_files if str(p) in quarantined]
+            if skipped:
+                logger.warning(
+                    f"Skipping {len(skipped)} quarantined videos listed in "
+                    f"{self.cfg.quarantine_csv}"
+                )
+                video_files = [p for p in video_files if str(p) not in quarantined]
+
         if not video_files:
             logger.warning(f"No video files found in {self.cfg.input_path}")
             return {} if self.cfg.web_mode else None
@@ -305,18 +1239,223 @@ class FrameExtractor:
             )
 
         logger.info(f"Found {len(video_files)} videos to process")
+
+        # Distributed nodes probe each video once they have claimed it instead
+        if self.cfg.probe_inputs and not self.cfg.queue_dir:
+            video_files = self._probe_inputs(video_files)
+            if not video_files:
+                logger.warning(f"No valid video files found in {self.cfg.input_path}")
+                self.finish_run()
+                self._save_logs_and_metadata()
+                return {} if self.cfg.web_mode else None
+
+        if self.cfg.queue_dir:
+            self._process_directory_distributed(video_files)
+            self.finish_run()
+            if self.cfg.parquet_dir:
+                # Every node appends its own files; no merge step is needed. The
+                # records hold exactly the rows this node wrote to its shards
+                append_run(self.cfg.parquet_dir, self.log_df, self.metadata_df)
+            return {} if self.cfg.web_mode else None
+
         all_frames = {} if self.cfg.web_mode else None
 
+        # Remaining time is extrapolated from the video seconds processed so far
+        total = sum(self._probed_span(p) for p in video_files)
+        done = 0.0
+        started = time.monotonic()
         for idx, video_path in enumerate(video_files, 1):
-            logger.info(f"Processing {idx}/{len(video_files)}: {video_path.name}")
+            eta = ""
+            if done:
+                left = (total - done) * (time.monotonic() - started) / done
+                eta = f" (about {format_seconds(left)} left)"
+            logger.info(f"Processing {idx}/{len(video_files)}: {video_path.name}{eta}")
             result = self.process_video(video_path)
+            done += self._probed_span(video_path)
 
             if self.cfg.web_mode and result:
                 all_frames[str(video_path)] = result
 
+        self.finish_run()
         self._save_logs_and_metadata()
         return all_frames
 
+    def _probe_inputs(self, video_files: List[Path]) -> List[Path]:
+        """Probe all inputs, log the invalid ones and return the rest longest first."""
+        logger.info(
+            f"Probing {len(video_files)} videos with {self.cfg.probe_workers} workers"
+        )
+        self.probes = probe_videos(
+            self.cfg.ffmpeg_path,
+            video_files,
+            workers=self.cfg.probe_workers,
+            timeout=self.cfg.ffmpeg_min_timeout,
+        )
+
+        valid = []
+        for video_path in video_files:
+            probe = self.probes[str(video_path)]
+            if probe.valid:
+                valid.append(video_path)
+                continue
+            self._reject(video_path, probe)
+
+        # Longest first, so no long video is left to run alone at the end
+        valid.sort(key=self._probed_span, reverse=True)
+        self._log_estimate(valid)
+        return valid
+
+    def _reject(self, video_path: Path, probe):
+        logger.warning(f"Rejecting {video_path.name}: {probe.error}")
+        self._update_log(
+            video_path,
+            0,
+            None,
+            "invalid",
+            probe.error,
+            metadata=parse_video_filename(video_path.name),
+        )
+
+    def _probe_claimed(self, video_path: Path) -> bool:
+        """Probe a video this node has claimed; False (logged) when it is invalid."""
+        if not self.cfg.probe_inputs:
+            return True
+        probe = probe_video(
+            self.cfg.ffmpeg_path, video_path, timeout=self.cfg.ffmpeg_min_timeout
+        )
+        self.probes[str(video_path)] = probe
+        if not probe.valid:
+            self._reject(video_path, probe)
+        return probe.valid
+
+    def _probed_span(self, video_path: Path) -> float:
+        """Seconds of the video inside the sampling window (0 when not probed)."""
+        probe = self.probes.get(str(video_path))
+        if probe is None or not probe.duration:
+            return 0.0
+        start, duration = sampling_window(self.cfg)
+        start = min(start or 0.0, probe.duration)
+        end = (
+            probe.duration
+            if duration is None
+            else min(start + duration, probe.duration)
+        )
+        return end - start
+
+    def _expected_frames(self, video_path: Path) -> Optional[int]:
+        """Frames the sampling mode will extract, or None when it cannot be known."""
+        probe = self.probes[str(video_path)]
+        mode = self.cfg.sampling_mode
+        if mode == "iframe":
+            start, duration = sampling_window(self.cfg)
+            end = None if duration is None else (start or 0.0) + duration
+            return probe.keyframes_between(start, end)
+        if mode == "fps":
+            return int(self._probed_span(video_path) * self.cfg.sample_fps)
+        if mode == "timestamps":
+            return sum(1 for t in self.cfg.timestamps if t <= probe.duration)
+        return None
+
+    def _log_estimate(self, video_files: List[Path]):
+        if not video_files:
+            return
+        media_seconds = sum(self._probed_span(p) for p in video_files)
+        frames = [self._expected_frames(p) for p in video_files]
+        longest = self.probes[str(video_files[0])]
+        frames_text = (
+            f"~{sum(frames)} frames" if None not in frames else "frame count unknown"
+        )
+        logger.info(
+            f"Work: {len(video_files)} videos, "
+            f"{format_seconds(media_seconds)} of video, {frames_text}; "
+            f"longest {Path(longest.path).name} ({longest.duration:.0f}s, "
+            f"{longest.codec} {longest.width}x{longest.height}, "
+            f"GOP {longest.gop_seconds:.1f}s)"
+        )
+        estimate = format_seconds(media_seconds / self.cfg.estimate_speed)
+        logger.info(
+            f"Estimated time: {estimate} at {self.cfg.estimate_speed:g}x realtime"
+        )
+
+    def _process_directory_distributed(self, video_files: List[Path]):
+        """Process videos cooperatively with other nodes sharing ``queue_dir``.
+
+        Each node writes its own log/metadata shards; run with ``--merge_shards``
+        once all nodes are finished to build ``log_file`` and ``metadata_csv``.
+        """
+        queue = WorkQueue(
+            self.cfg.queue_dir,
+            node_id=self.cfg.node_id,
+            lease_timeout=self.cfg.lease_timeout,
+            heartbeat_interval=self.cfg.heartbeat_interval,
+        )
+        keys = {self._task_key(p): p for p in video_files}
+        logger.info(f"Node {queue.node_id} joined work queue at {self.cfg.queue_dir}")
+
+        queue.start_heartbeat()
+        self.claim_check = lambda video_path: queue.owns(self._task_key(video_path))
+        self.node_id = queue.node_id
+        processed = 0
+        try:
+            pending = queue.pending(keys)
+            while pending:
+                for key in pending:
+                    if not queue.claim(key):
+                        continue
+                    log_start = len(self.log_df)
+                    metadata_start = len(self.metadata_df)
+                    video_path = keys[key]
+                    logger.info(f"Node {queue.node_id} processing {video_path.name}")
+                    try:
+                        # An invalid input is logged and completed like any other
+                        if self._probe_claimed(video_path):
+                            self.process_video(video_path)
+                    except BaseException:
+                        queue.release(key)
+                        raise
+
+                    if not queue.owns(key):
+                        # The new owner's rows are the ones that count
+                        logger.warning(
+                            f"Node {queue.node_id} lost {video_path.name} to "
+                            "another node; discarding its result"
+                        )
+                        queue.release(key)
+                        # Keep the rows out of the Parquet run appended at the end too
+                        with self._records_lock:
+                            self.log_df = self.log_df.iloc[:log_start]
+                            self.metadata_df = self.metadata_df.iloc[:metadata_start]
+                        continue
+                    log_rows = self.log_df.iloc[log_start:]
+                    status = (
+                        log_rows["status"].iloc[-1] if not log_rows.empty else "failed"
+                    )
+                    queue.append_shards(
+                        log_rows, self.metadata_df.iloc[metadata_start:]
+                    )
+                    if queue.complete(key, status=status):
+                        processed += 1
+
+                pending = queue.pending(keys)
+                if pending:
+                    # Remaining work is claimed by other nodes; wait in case one dies.
+                    logger.debug(
+                        f"{len(pending)} videos held by other nodes, "
+                        f"waiting {self.cfg.queue_poll_interval}s"
+                    )
+                    time.sleep(self.cfg.queue_poll_interval)
+        finally:
+            queue.stop_heartbeat()
+            self.claim_check = self.node_id = None
+
+        logger.info(f"Node {queue.node_id} finished; processed {processed} videos")
+
+    def _task_key(self, video_path: Path) -> str:
+        try:
+            return video_path.relative_to(self.cfg.input_path).as_posix()
+        except ValueError:
+            return video_path.as_posix()
+
     def _save_logs_and_metadata(self):
         if self.cfg.log_file:
             self.log_df.to_csv(self.cfg.log_file, index=False)
@@ -326,10 +1465,27 @@ class FrameExtractor:
             self.metadata_df.to_csv(self.cfg.metadata_csv, index=False)
             logger.info(f"Saved video metadata to {self.cfg.metadata_csv}")
 
+        if self.cfg.parquet_dir:
+            append_run(self.cfg.parquet_dir, self.log_df, self.metadata_df)
+
 
 def main():
     logger.info("Starting frame extraction process")
     cfg = pyrallis.parse(config_class=Config)
+    if cfg.merge_shards:
+        if not cfg.queue_dir:
+            logger.error("--merge_shards requires --queue_dir")
+            return
+        merge_shards(cfg.queue_dir, cfg.log_file, cfg.metadata_csv)
+        logger.info("Shard merge completed")
+        return
+    if cfg.compact_parquet:
+        if not cfg.parquet_dir:
+            logger.error("--compact_parquet requires --parquet_dir")
+            return
+        compact_parquet(cfg.parquet_dir)
+        logger.info("Parquet compaction completed")
+        return
     # For CLI mode, default to using parent directory as output
     cfg.use_parent_dir = True
     extractor = FrameExtractor(cfg)
@@ -337,15 +1493,14 @@ def main():
     logger.info("Frame extraction completed")
 
 
-def extract_frames_for_web(
-    input_path, output_dir=None, progress_callback=None, **kwargs
-):
-    """Enhanced function for web interface to extract frames with progress tracking."""
+def _web_extractor(input_path, output_dir=None, **kwargs) -> FrameExtractor:
     config_args = {
         "input_path": Path(input_path),
         "web_mode": True,
         "use_parent_dir": output_dir is None,
         "overwrite": True,  # Default to overwrite in web mode
+        # Uploads are one-off, so a quarantine list would never be consulted
+        "quarantine_csv": None,
     }
 
     if output_dir:
@@ -355,17 +1510,71 @@ def extract_frames_for_web(
 
     # Update with any additional parameters
     config_args.update(kwargs)
-    cfg = Config(**config_args)
+    return FrameExtractor(Config(**config_args))
+
+
+def extract_video_for_web(
+    video_path, output_dir=None, progress_callback=None, **kwargs
+) -> Tuple[VideoResult, List[str]]:
+    """Extract one uploaded video; returns its result and the frame paths to serve."""
+    extractor = _web_extractor(video_path, output_dir, **kwargs)
+    result = extractor.extract_video(Path(video_path), progress_callback)
+    extractor.finish_run()
+    return result, extractor.web_frame_paths(result)
 
-    extractor = FrameExtractor(cfg)
+
+def extract_frames_for_web(
+    input_path, output_dir=None, progress_callback=None, **kwargs
+):
+    """Enhanced function for web interface to extract frames with progress tracking."""
+    extractor = _web_extractor(input_path, output_dir, **kwargs)
 
     if Path(input_path).is_file():
         # Direct processing of a single file
-        return extractor.process_video(Path(input_path), progress_callback)
+        result = extractor.process_video(Path(input_path), progress_callback)
+        extractor.finish_run()
+        return result
     else:
         # Directory processing (less common in web mode)
         return extractor.process_input()
 
 
+def extract_videos(
+    video_paths, output_root, executor=None, **kwargs
+) -> List[VideoResult]:
+    """Library entry point: extract ``video_paths`` into ``output_root``.
+
+    Returns one ``VideoResult`` per input, in input order; failures are
+    reported in the results rather than raised. Pass ``executor`` (a thread
+    pool) to process the videos concurrently. Unlike the CLI and web modes,
+    outputs always go under ``output_root``: mirroring the tree below
+    ``input_path`` when it is given, otherwise in one directory per video
+    named after it. No log, metadata or quarantine files are written unless
+    configured.
+    """
+    config_args = {
+        "output_root": Path(output_root),
+        "log_file": None,
+        "metadata_csv": None,
+        "quarantine_csv": None,
+        **kwargs,
+    }
+    if "input_path" in config_args:
+        config_args["input_path"] = Path(config_args["input_path"])
+    else:
+        # Nothing to mirror: one directory per video, named after it
+        config_args.setdefault("maintain_structure", False)
+    extractor = FrameExtractor(Config(**config_args))
+
+    video_paths = [Path(p) for p in video_paths]
+    results = {
+        str(result.video_path): result
+        for result in extractor.extract_videos(video_paths, executor)
+    }
+    extractor.finish_run()
+    extractor._save_logs_and_metadata()
+    return [results[str(p)] for p in video_paths]
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,14 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    """The web interface module, with its folders under ``tmp_path``."""
+    # The module creates its upload and output folders in the working directory
+    monkeypatch.chdir(tmp_path)
+    web_interface = importlib.import_module("web_interface")
+    web_interface.retention.stop()
+    monkeypatch.setattr(web_interface, "OUTPUT_FOLDER", tmp_path / "extracted_frames")
+    return web_interface
@@ -0,0 +1,94 @@
+"""
+FrameExtractor behaviour that needs no FFmpeg: a Python child stands in for
+it where a process has to run.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from lib.frame_tensor import TENSOR_FILE, FrameTensorWriter
+from lib.output_formats import RAW_FRAMES_FILE, write_raw_header
+from lib.results import SKIPPED
+from main import Config, FrameExtractor, extract_videos
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    return FrameExtractor(
+        Config(
+            input_path=tmp_path,
+            output_root=tmp_path / "out",
+            log_file=None,
+            metadata_csv=None,
+            quarantine_csv=None,
+        )
+    )
+
+
+def test_failure_reports_ffmpeg_error_not_showinfo(extractor, tmp_path):
+    # A long run: far more per-frame showinfo lines than headers are kept
+    script = "\n".join(
+        [
+            "import sys",
+            "print('Input #0, mov,mp4,m4a,3gp,3g2,mj2, from \\'clip.mp4\\':', file=sys.stderr)",
+            "for n in range(500):",
+            "    print(f'[Parsed_showinfo_1 @ 0x1] n: {n} pts_time:{n}', file=sys.stderr)",
+            "    print('[Parsed_showinfo_1 @ 0x1] color_range:tv', file=sys.stderr)",
+            "print('Error writing frame: No space left on device', file=sys.stderr)",
+            "print('bench: utime=1.0s stime=0.1s rtime=2.0s', file=sys.stderr)",
+            "sys.exit(1)",
+        ]
+    )
+    with pytest.raises(subprocess.CalledProcessError) as failure:
+        extractor._run_ffmpeg(
+            tmp_path / "clip.mp4", [sys.executable, "-c", script], None, lambda n: None
+        )
+    assert failure.value.stderr == "Error writing frame: No space left on device"
+
+
+def test_library_outputs_one_directory_per_video(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    relative = tmp_path / "clips" / "sub" / "a.mp4"
+    relative.parent.mkdir(parents=True)
+    relative.touch()
+    # No FFmpeg here: the videos fail, but their output directories are decided
+    results = extract_videos(
+        ["clips/sub/a.mp4", relative], "out", ffmpeg_path="/nonexistent/ffmpeg"
+    )
+    assert [result.output_dir for result in results] == [Path("out/a")] * 2
+
+
+@pytest.mark.parametrize("output_format", ["raw", "tensor"])
+def test_skip_existing_counts_single_file_frames(tmp_path, output_format):
+    video = tmp_path / "clip.mp4"
+    video.touch()
+    output_dir = tmp_path / "out" / "clip"
+    output_dir.mkdir(parents=True)
+    frames = np.zeros((5, 2, 3, 3), dtype=np.uint8)
+    if output_format == "raw":
+        (output_dir / RAW_FRAMES_FILE).write_bytes(frames.tobytes())
+        write_raw_header(output_dir, 3, 2)
+    else:
+        with FrameTensorWriter(output_dir / TENSOR_FILE) as writer:
+            writer.write(frames.tobytes())
+            writer.end_video(video, 3, 2)
+    extractor = FrameExtractor(
+        Config(
+            input_path=tmp_path,
+            output_root=tmp_path / "out",
+            output_format=output_format,
+            skip_existing=True,
+            probe_inputs=False,
+            log_file=None,
+            metadata_csv=None,
+            quarantine_csv=None,
+            ffmpeg_path="/nonexistent/ffmpeg",
+        )
+    )
+    result = extractor.extract_video(video)
+    assert result.status == SKIPPED
+    assert result.frame_count == 5
@@ -0,0 +1,35 @@
+"""
+Stall watchdog of the FFmpeg supervisor, with plain Python children standing
+in for FFmpeg so no media or FFmpeg binary is needed.
+"""
+
+import sys
+
+import pytest
+
+from lib.ffmpeg_supervisor import FFmpegSupervisor, FFmpegTimeoutError
+
+needs_proc = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="liveness is read from /proc"
+)
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+@needs_proc
+def test_busy_silent_child_is_not_a_stall():
+    # Like a select filter working through a long GOP: computing, printing nothing
+    busy = python(
+        "import time\nend = time.monotonic() + 3\nwhile time.monotonic() < end: pass"
+    )
+    supervisor = FFmpegSupervisor(stall_timeout=1.0)
+    assert supervisor.run(busy, lambda line: None, poll_interval=0.1) == 0
+
+
+def test_idle_silent_child_is_killed():
+    idle = python("import time; time.sleep(30)")
+    supervisor = FFmpegSupervisor(stall_timeout=1.0)
+    with pytest.raises(FFmpegTimeoutError, match="No progress"):
+        supervisor.run(idle, lambda line: None, poll_interval=0.1)
@@ -0,0 +1,33 @@
+"""
+Frame quality scoring: streamed gray frames and the settings behind dedup keys.
+"""
+
+import numpy as np
+
+from lib.frame_quality import FrameScorer, score_batch
+from main import Config, extraction_params
+
+
+def test_gray_stream_buffers_until_size_is_known():
+    frames = np.random.default_rng(0).integers(0, 256, (5, 4, 6), dtype=np.uint8)
+    data = frames.tobytes()
+    size = None
+    scorer = FrameScorer(workers=1, batch_size=2)
+    try:
+        on_bytes, finish = scorer.gray_stream(lambda: size)
+        # Frame data can arrive before FFmpeg's stderr describes the output
+        on_bytes(data[:50])
+        size = (6, 4)
+        on_bytes(data[50:])
+        scores = finish()
+    finally:
+        scorer.shutdown()
+    expected = score_batch(frames)
+    for metric, values in expected.items():
+        np.testing.assert_allclose(scores[metric], values, rtol=1e-5)
+
+
+def test_scoring_width_only_keys_thresholded_output():
+    assert "quality_thresholds" not in extraction_params(Config(quality_width=80))
+    params = extraction_params(Config(min_sharpness=5.0, quality_width=80))
+    assert params["quality_thresholds"][-1] == 80
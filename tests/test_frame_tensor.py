@@ -0,0 +1,78 @@
+"""
+Frame tensor files: what the writer stores is what the reader maps back.
+"""
+
+import numpy as np
+import pytest
+
+from lib.frame_tensor import FrameTensorReader, FrameTensorWriter
+
+
+def frames_of(seed, count, height=4, width=6):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (count, height, width, 3), dtype=np.uint8)
+
+
+def test_round_trip(tmp_path):
+    first, second = frames_of(0, 3), frames_of(1, 2)
+    path = tmp_path / "frames.ifrt"
+    with FrameTensorWriter(path) as writer:
+        writer.write(first.tobytes())
+        assert writer.end_video("a.mp4", 6, 4, pts=[0.0, 1.5, 3.0]) == 3
+        # Chunks need not align with frame boundaries
+        data = second.tobytes()
+        writer.write(data[:10])
+        writer.write(data[10:])
+        writer.end_video("b.mp4", 6, 4, pts=[2.0], metadata={"speaker": "A2"})
+
+    reader = FrameTensorReader(path)
+    assert len(reader) == 5
+    assert reader.shape == (5, 4, 6, 3)
+    np.testing.assert_array_equal(reader[:], np.concatenate([first, second]))
+    np.testing.assert_array_equal(reader.video_frames("b.mp4"), second)
+    # Missing PTS are NaN rather than shifted onto other frames
+    assert reader.metadata(3) == {"video_path": "b.mp4", "pts": 2.0, "speaker": "A2"}
+    assert np.isnan(reader.metadata(4)["pts"])
+    table = reader.frame_table()
+    assert list(table["video_path"]) == ["a.mp4"] * 3 + ["b.mp4"] * 2
+    assert list(table["pts"][:3]) == [0.0, 1.5, 3.0]
+
+
+def test_truncated_frame_is_dropped(tmp_path):
+    frames = frames_of(2, 2)
+    path = tmp_path / "frames.ifrt"
+    with FrameTensorWriter(path) as writer:
+        writer.write(frames.tobytes() + b"\x01" * 7)
+        assert writer.end_video("a.mp4", 6, 4) == 2
+        writer.write(frames_of(3, 1).tobytes())
+        writer.end_video("b.mp4", 6, 4)
+    reader = FrameTensorReader(path)
+    np.testing.assert_array_equal(reader[:2], frames)
+    assert reader.video_of(2)["video_path"] == "b.mp4"
+
+
+def test_aborted_video_leaves_no_frames(tmp_path):
+    path = tmp_path / "frames.ifrt"
+    with FrameTensorWriter(path) as writer:
+        writer.write(frames_of(4, 2).tobytes())
+        writer.abort_video()
+        writer.write(frames_of(5, 1).tobytes())
+        writer.end_video("b.mp4", 6, 4)
+    reader = FrameTensorReader(path)
+    np.testing.assert_array_equal(reader[:], frames_of(5, 1))
+
+
+def test_mismatched_frame_size_is_rejected(tmp_path):
+    writer = FrameTensorWriter(tmp_path / "frames.ifrt")
+    writer.write(frames_of(6, 1).tobytes())
+    writer.end_video("a.mp4", 6, 4)
+    with pytest.raises(ValueError, match="does not match"):
+        writer.end_video("b.mp4", 8, 4)
+    writer.discard()
+
+
+def test_not_a_tensor_file(tmp_path):
+    path = tmp_path / "frames.ifrt"
+    path.write_bytes(b"\0" * 4096)
+    with pytest.raises(ValueError, match="not a frame tensor file"):
+        FrameTensorReader(path)
@@ -0,0 +1,37 @@
+"""
+Job event logs and the routes that serve them.
+"""
+
+from lib.progress_events import EventHub
+
+
+def test_snapshot_of_a_lagging_subscriber_describes_its_own_job():
+    hub = EventHub(capacity=4)
+    old = hub.new_job()
+    old.publish("start", {"video": "old.mp4", "output_dir": "out/old"})
+    for i in range(1, 7):
+        old.publish("frames", {"frames": [f"old/frame_{i:04d}.png"]})
+    old.publish("complete", {"frame_count": 6, "cached": False})
+    new = hub.new_job()
+    new.publish("start", {"video": "new.mp4", "output_dir": "out/new"})
+
+    events, missed = old.events_since(0)
+    assert missed
+    snapshot = old.snapshot()
+    assert snapshot["job_id"] == old.job_id
+    assert snapshot["video"] == "old.mp4"
+    assert snapshot["completed"] and snapshot["finished"]
+    assert len(snapshot["frames"]) == 6
+
+
+def test_poll_timeout_is_validated_and_clamped(web):
+    job = web.event_hub.new_job()
+    job.publish("complete", {"frame_count": 0, "cached": False})
+    client = web.app.test_client()
+
+    for timeout in ("soon", "nan", "inf"):
+        response = client.get(f"/events/poll?job_id={job.job_id}&timeout={timeout}")
+        assert response.status_code == 400
+    response = client.get(f"/events/poll?job_id={job.job_id}&timeout=-5")
+    assert response.status_code == 200
+    assert response.get_json()["finished"]
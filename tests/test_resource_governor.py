@@ -0,0 +1,23 @@
+"""
+Admission decisions of the web interface's resource governor.
+"""
+
+import pytest
+
+from lib.resource_governor import AdmissionRejected, ResourceGovernor
+
+
+def test_zip_download_is_admitted_while_extraction_runs(tmp_path):
+    governor = ResourceGovernor(max_cpu_threads=7, disk_path=str(tmp_path))
+    governor.acquire("extract", cpu_threads=governor.max_cpu_threads)
+    # As download_frames asks: temporary disk only
+    ticket = governor.acquire("zip", temp_bytes=1024, wait=0.1)
+    assert ticket.cpu_threads == 0
+
+
+def test_second_extraction_is_rejected_after_waiting(tmp_path):
+    governor = ResourceGovernor(max_cpu_threads=7, disk_path=str(tmp_path))
+    governor.acquire("extract", cpu_threads=7)
+    with pytest.raises(AdmissionRejected) as rejected:
+        governor.acquire("extract", cpu_threads=7, wait=0.1)
+    assert rejected.value.retry_after >= 1
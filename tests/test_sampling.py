@@ -0,0 +1,38 @@
+"""
+FFmpeg arguments built by the sampling policies.
+"""
+
+import pytest
+
+from main import Config
+from lib.sampling import build_sampling_args
+
+
+def timestamps_config(**kwargs):
+    return Config(sampling_mode="timestamps", **kwargs)
+
+
+def test_timestamps_are_relative_to_the_seek_point():
+    input_args, video_filter = build_sampling_args(
+        timestamps_config(timestamps=[12.0, 15.5], start_time=10.0, end_time=20.0)
+    )
+    assert input_args == ["-ss", "10", "-t", "10"]
+    assert "gte(t,2)" in video_filter and "gte(t,5.5)" in video_filter
+
+
+def test_timestamps_without_window_decode_only_their_span():
+    input_args, _ = build_sampling_args(timestamps_config(timestamps=[4.0, 6.0]))
+    assert input_args == ["-ss", "4", "-t", "3"]
+
+
+@pytest.mark.parametrize(
+    "window, timestamps, message",
+    [
+        ({"start_time": 10.0}, [5.0, 12.0], "outside the time window"),
+        ({"end_time": 10.0}, [2.0, 10.0], "outside the time window"),
+        ({}, [-1.0, 3.0], "must not be negative"),
+    ],
+)
+def test_timestamps_outside_the_window_are_rejected(window, timestamps, message):
+    with pytest.raises(ValueError, match=message):
+        build_sampling_args(timestamps_config(timestamps=timestamps, **window))
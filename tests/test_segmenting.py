@@ -0,0 +1,65 @@
+"""
+Keyframe-aligned segment planning and keyframe listing parsing.
+"""
+
+from fractions import Fraction
+
+from lib.segmenting import BOUNDARY_GUARD, parse_keyframe_listing, plan_segments
+
+KEYFRAMES = [Fraction(t) for t in range(0, 120, 10)]
+
+
+def test_splits_at_keyframes_nearest_the_even_split():
+    assert plan_segments(KEYFRAMES, 120.0, 3) == [
+        (None, 40 - BOUNDARY_GUARD),
+        (40.0, 80 - BOUNDARY_GUARD),
+        (80.0, None),
+    ]
+
+
+def test_min_length_limits_the_segment_count():
+    segments = plan_segments(KEYFRAMES, 120.0, 8, min_length=50)
+    assert segments == [(None, 60 - BOUNDARY_GUARD), (60.0, None)]
+
+
+def test_min_length_holds_for_the_last_segment():
+    # The keyframe nearest the second target would leave a 10 s tail
+    keyframes = [Fraction(0), Fraction(35), Fraction(90)]
+    segments = plan_segments(keyframes, 100.0, 3, min_length=30)
+    assert segments == [(None, 35 - BOUNDARY_GUARD), (35.0, None)]
+
+
+def test_too_short_for_min_length_is_not_split():
+    assert plan_segments(KEYFRAMES, 120.0, 4, min_length=100) == [(None, None)]
+
+
+def test_keyframes_at_the_window_edges_do_not_make_empty_segments():
+    # Only the keyframes at the window's start and end are available
+    keyframes = [Fraction(20), Fraction(60)]
+    assert plan_segments(keyframes, 120.0, 2, start=20, end=60) == [(20, 60)]
+
+
+def test_window_is_split_inside_its_bounds():
+    segments = plan_segments(KEYFRAMES, 120.0, 2, start=15, end=95)
+    assert segments == [(15, 50 - BOUNDARY_GUARD), (50.0, 95)]
+
+
+def test_parse_keyframe_listing():
+    listing = "\n".join(
+        [
+            "#software: Lavf61.1.100",
+            "#tb 0: 1/12800",
+            "#media_type 0: video",
+            "#codec_id 0: rawvideo",
+            "0,      -1024,          0,      512,    12345, 0x1a2b3c4d",
+            "0,      63488,      64000,      512,     2345, 0x2b3c4d5e, F=0x1",
+            "0,      31744,      32000,      512,     3456, 0x3c4d5e6f",
+            "0,      63488,      64000,      512,     2345, 0x2b3c4d5e",
+            "0,          0,     NOPTS,      512,      100, 0x00000000",
+        ]
+    )
+    assert parse_keyframe_listing(listing) == [
+        Fraction(0),
+        Fraction(5, 2),
+        Fraction(5),
+    ]
@@ -0,0 +1,36 @@
+"""
+Serving frames of a running web job, with extraction stubbed out so no
+FFmpeg is needed.
+"""
+
+from lib.output_staging import commit_staging, staging_dir_for
+from lib.results import SUCCESS, VideoResult
+
+
+def test_reextraction_serves_new_frames_not_the_old_output(web, tmp_path, monkeypatch):
+    output_dir = web.OUTPUT_FOLDER / "clip"
+    output_dir.mkdir(parents=True)
+    for i in (1, 2):
+        (output_dir / f"frame_{i:04d}.png").write_bytes(b"old %d" % i)
+    video_path = tmp_path / "clip.mp4"
+    video_path.write_bytes(b"new upload")
+
+    client = web.app.test_client()
+    served = []
+
+    def extract(video_path, output_dir, progress_callback, **kwargs):
+        staging_dir = staging_dir_for(output_dir / "clip")
+        staging_dir.mkdir()
+        (staging_dir / "frame_0001.png").write_bytes(b"new 1")
+        progress_callback.frames_written(["clip/frame_0001.png"])
+        served.append(client.get("/frames/clip/frame_0001.png").data)
+        commit_staging(staging_dir, output_dir / "clip")
+        return VideoResult(video_path, SUCCESS, output_dir / "clip"), []
+
+    monkeypatch.setattr(web, "extract_video_for_web", extract)
+    web.background_process_video(str(video_path))
+
+    assert web.processing_status["error"] is None
+    assert served == [b"new 1"]
+    assert client.get("/frames/clip/frame_0001.png").data == b"new 1"
+    assert client.get("/frames/clip/frame_0002.png").status_code == 404
@@ -0,0 +1,188 @@
+"""
+Distributed mode run locally: several worker processes share one temporary
+queue directory, the way nodes share a network mount.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from lib.output_staging import prepare_staging
+from lib.work_queue import WorkQueue
+from main import Config, FrameExtractor
+
+LEASE = 1.0
+
+
+def run_worker(queue_dir, keys, results_dir, node_id, work_seconds=0.02):
+    """A node's loop from ``_process_directory_distributed`` without FFmpeg."""
+    queue = WorkQueue(
+        queue_dir, node_id=node_id, lease_timeout=LEASE, heartbeat_interval=LEASE / 4
+    )
+    queue.start_heartbeat()
+    try:
+        pending = queue.pending(keys)
+        while pending:
+            for key in pending:
+                if not queue.claim(key):
+                    continue
+                time.sleep(work_seconds)
+                if queue.owns(key):
+                    (results_dir / f"{key}.{node_id}").touch()
+                    queue.complete(key)
+            pending = queue.pending(keys)
+            if pending:
+                time.sleep(0.05)
+    finally:
+        queue.stop_heartbeat()
+
+
+def claim_and_hang(queue_dir, key, claimed):
+    """A node that takes a task and then stops responding until it is killed."""
+    queue = WorkQueue(
+        queue_dir, node_id="doomed", lease_timeout=LEASE, heartbeat_interval=0.1
+    )
+    queue.claim(key)
+    queue.start_heartbeat()
+    claimed.set()
+    time.sleep(60)
+
+
+def start(target, *args):
+    process = multiprocessing.Process(target=target, args=args)
+    process.start()
+    return process
+
+
+def test_workers_run_every_task_exactly_once(tmp_path):
+    queue_dir, results_dir = tmp_path / "queue", tmp_path / "results"
+    results_dir.mkdir()
+    keys = [f"video_{i:02d}.mp4" for i in range(24)]
+
+    workers = [
+        start(run_worker, queue_dir, keys, results_dir, f"node-{n}") for n in range(4)
+    ]
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    results = sorted(p.name.rsplit(".", 1)[0] for p in results_dir.iterdir())
+    assert results == keys
+    # The work was actually shared
+    assert len({p.suffix for p in results_dir.iterdir()}) > 1
+
+
+def test_killed_node_lease_is_reclaimed(tmp_path):
+    queue_dir, results_dir = tmp_path / "queue", tmp_path / "results"
+    results_dir.mkdir()
+    keys = ["held.mp4", "free.mp4"]
+
+    claimed = multiprocessing.Event()
+    doomed = start(claim_and_hang, queue_dir, keys[0], claimed)
+    assert claimed.wait(timeout=30)
+    doomed.kill()
+    doomed.join()
+
+    started = time.monotonic()
+    survivor = start(run_worker, queue_dir, keys, results_dir, "survivor")
+    survivor.join(timeout=60)
+    assert survivor.exitcode == 0
+    # Only after the dead node's lease ran out
+    assert time.monotonic() - started >= LEASE * 0.9
+
+    assert sorted(p.name for p in results_dir.iterdir()) == [
+        "free.mp4.survivor",
+        "held.mp4.survivor",
+    ]
+    done = WorkQueue(queue_dir)._done_path(WorkQueue.task_id(keys[0]))
+    assert json.loads(done.read_text())["node"] == "survivor"
+
+
+def test_slow_node_is_fenced_off_after_reclaim(tmp_path):
+    slow = WorkQueue(tmp_path, node_id="slow", lease_timeout=LEASE)
+    fast = WorkQueue(tmp_path, node_id="fast", lease_timeout=LEASE)
+    key = "clip.mp4"
+    assert slow.claim(key)
+
+    # The slow node misses its heartbeats long enough for the lease to expire
+    claim_path = slow._claim_path(WorkQueue.task_id(key))
+    past = time.time() - 10 * LEASE
+    os.utime(claim_path, (past, past))
+    assert fast.claim(key)
+    mark = time.time() - LEASE / 2
+    os.utime(claim_path, (mark, mark))
+
+    # The slow node's heartbeat drops the claim instead of extending the new lease
+    slow.heartbeat()
+    assert not slow.owns(key)
+    assert not slow._held
+    assert os.path.getmtime(claim_path) == mark
+
+    # Neither finishing nor releasing touches the new owner's claim
+    assert not slow.complete(key)
+    slow.release(key)
+    assert fast.owns(key)
+    assert not slow.is_done(key)
+
+    assert fast.complete(key)
+    assert fast.is_done(key)
+    assert not claim_path.exists()
+
+
+def test_reclaimed_output_gets_its_own_staging_directory(tmp_path):
+    output_dir = tmp_path / "out" / "clip"
+    slow_staging = prepare_staging(output_dir, "slow")
+    fast_staging = prepare_staging(output_dir, "fast")
+    assert slow_staging != fast_staging
+
+    # The slow node's FFmpeg opens its next frame by path and fails instead of
+    # writing into the new owner's directory
+    with pytest.raises(FileNotFoundError):
+        (slow_staging / "frame_0002.png").write_bytes(b"late")
+    assert fast_staging.is_dir()
+    assert not any(fast_staging.iterdir())
+
+
+def test_extractor_discards_result_of_lost_claim(tmp_path):
+    video_path = tmp_path / "videos" / "clip.mp4"
+    video_path.parent.mkdir()
+    video_path.touch()
+    queue_dir = tmp_path / "queue"
+    extractor = FrameExtractor(
+        Config(
+            input_path=video_path.parent,
+            output_root=tmp_path / "out",
+            queue_dir=queue_dir,
+            node_id="slow",
+            lease_timeout=LEASE,
+            heartbeat_interval=LEASE / 4,
+            queue_poll_interval=0.05,
+            probe_inputs=False,
+            log_file=None,
+            metadata_csv=None,
+        )
+    )
+    fast = WorkQueue(queue_dir, node_id="fast", lease_timeout=LEASE)
+    key = "clip.mp4"
+
+    def slow_process_video(path):
+        # The lease runs out mid-extraction and another node takes the video
+        claim_path = fast._claim_path(WorkQueue.task_id(key))
+        past = time.time() - 10 * LEASE
+        os.utime(claim_path, (past, past))
+        assert fast.claim(key)
+        threading.Timer(0.3, fast.complete, (key,)).start()
+        extractor._update_log(path, 3, tmp_path / "out" / "clip", "success")
+
+    extractor.process_video = slow_process_video
+    extractor._process_directory_distributed([video_path])
+
+    assert not any(path.exists() for path in WorkQueue(queue_dir, "slow").shard_paths())
+    # Nor does it reach the node's own records, which feed the Parquet dataset
+    assert extractor.log_df.empty
+    done = fast._done_path(WorkQueue.task_id(key))
+    assert json.loads(done.read_text())["node"] == "fast"
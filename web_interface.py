@@ -1,6 +1,8 @@
 __author__ = {"name": "Raghav Gupta", "username": "Raghav-56"}
 
 # Standard library imports
+import json
+import math
 import os
 import shutil
 import tempfile
@@ -12,6 +14,7 @@ from pathlib import Path
 # Third-party imports
 from flask import (
     Flask,
+    Response,
     jsonify,
     render_template,
     request,
@@ -20,7 +23,15 @@ from flask import (
 )
 
 # Local application imports
-from main import extract_frames_for_web, Config, logger
+from main import extract_video_for_web, extraction_params, Config, logger
+from lib.frame_store import extraction_key, hash_file, new_content_hasher
+from lib.output_formats import frame_glob
+from lib.output_staging import staging_dir_for
+from lib.progress_events import EventHub
+from lib.resource_governor import AdmissionRejected, ResourceGovernor
+from lib.result_cache import ResultCache
+from lib.results import SUCCESS
+from lib.retention import RetentionManager
 
 app = Flask(__name__, static_folder="static")
 
@@ -33,13 +44,39 @@ app.config["MAX_CONTENT_LENGTH"] = 500 * 1024 * 1024  # 500MB max
 # Initialize with web-specific configuration
 OUTPUT_FOLDER = Path("extracted_frames")
 OUTPUT_FOLDER.mkdir(exist_ok=True, parents=True)
+
+# Admission control: FFmpeg threads, temporary disk and waiting requests are bounded
+governor = ResourceGovernor(
+    max_cpu_threads=int(os.environ.get("MAX_CPU_THREADS", 0)) or None,
+    max_temp_bytes=int(os.environ.get("MAX_TEMP_MB", 2048)) * 1024 * 1024,
+    max_queue_depth=int(os.environ.get("MAX_QUEUE_DEPTH", 4)),
+    disk_path=str(OUTPUT_FOLDER),
+)
+ZIP_ADMISSION_WAIT = 5.0  # Seconds a ZIP download may wait for capacity
+
 config = Config(
     input_path=UPLOAD_FOLDER,
     output_root=OUTPUT_FOLDER,
     web_mode=True,
     overwrite=True,
+    threads=governor.max_cpu_threads,
+    # Keep FFmpeg from starving the request handlers of CPU
+    ffmpeg_nice=10,
+    # Set PROFILE_DIR to write a profiling report for every extraction job
+    profile_dir=(
+        Path(os.environ["PROFILE_DIR"]) if os.environ.get("PROFILE_DIR") else None
+    ),
 )
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Finished extractions keyed by upload content and settings; the retention
+# manager below owns their directories and drops entries as it evicts them
+result_cache = ResultCache(OUTPUT_FOLDER)
+
+# Temporary ZIP archives for /download_frames, removed once sent
+ZIP_FOLDER = Path(tempfile.gettempdir()) / "frame_extractor_zips"
+ZIP_FOLDER.mkdir(exist_ok=True)
+
 # Use a lock to ensure thread-safe updates to the processing status
 status_lock = threading.Lock()
 processing_status = {
@@ -52,9 +89,38 @@ processing_status = {
     "end_time": None,
     "frames": [],
     "output_dir": None,
+    "job_id": None,
 }
 
 
+def _paths_in_use():
+    """Upload and output directory of the running job, kept by the retention sweep"""
+    with status_lock:
+        if not processing_status["is_processing"]:
+            return ()
+        return (processing_status["current_video"], processing_status["output_dir"])
+
+
+# Frame directories are evicted least recently accessed first beyond the budget
+# or after the TTL; uploads and ZIPs left behind by failed requests are swept
+retention_ttl_hours = float(os.environ.get("RETENTION_TTL_HOURS", 168))
+retention = RetentionManager(
+    OUTPUT_FOLDER,
+    budget_bytes=int(os.environ.get("RETENTION_BUDGET_MB", 10240)) * 1024 * 1024,
+    ttl=retention_ttl_hours * 3600 if retention_ttl_hours > 0 else None,
+    orphan_dirs=[UPLOAD_FOLDER, ZIP_FOLDER],
+    orphan_ttl=float(os.environ.get("ORPHAN_TTL_MINUTES", 60)) * 60,
+    result_cache=result_cache,
+    in_use=_paths_in_use,
+)
+retention.start()
+
+# Delta events per job for /events subscribers, so clients need not poll /status
+event_hub = EventHub()
+EVENT_KEEPALIVE_SECONDS = 15
+LONG_POLL_MAX_SECONDS = 30
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -69,6 +135,10 @@ def get_config():
         "output_format": config.output_format,
         "max_upload_size": app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024),
         "supported_formats": config.video_extensions,
+        "result_cache_entries": len(result_cache),
+        "retention_budget_mb": retention.budget_bytes // (1024 * 1024),
+        "retention_used_mb": retention.total_bytes // (1024 * 1024),
+        "load": governor.snapshot(),
     }
     return jsonify(current_config)
 
@@ -76,25 +146,62 @@ def get_config():
 class ProgressCallback:
     """Thread-safe progress callback for frame extraction"""
 
-    def __init__(self):
+    def __init__(self, job=None):
         self.progress = 0
+        self.job = job
+        self.published = 0
 
     def update(self, current, total):
         if total > 0:
-            self.progress = int((current / total) * 100)
+            progress = int((current / total) * 100)
+            if progress == self.progress:
+                return
+            self.progress = progress
             # Update global status with thread safety
             with status_lock:
                 processing_status["progress"] = self.progress
                 logger.debug(f"Progress updated: {self.progress}%")
+            if self.job is not None:
+                self.job.publish("progress", {"progress": self.progress})
+
+    def frames_written(self, frame_paths):
+        """Make frames visible while FFmpeg is still extracting the rest"""
+        with status_lock:
+            processing_status["frames"] = processing_status["frames"] + frame_paths
+        self.published += len(frame_paths)
+        if self.job is not None:
+            self.job.publish("frames", {"frames": frame_paths})
+
+
+def busy_response(rejection):
+    """503 with a Retry-After hint for work the governor did not admit"""
+    response = jsonify(
+        {"error": rejection.reason, "retry_after": rejection.retry_after}
+    )
+    response.status_code = 503
+    response.headers["Retry-After"] = str(rejection.retry_after)
+    return response
 
 
-def background_process_video(video_path):
+def cleanup_upload(video_path):
+    """Remove an uploaded file once its job is done with it"""
+    if str(video_path).startswith(str(UPLOAD_FOLDER)):
+        try:
+            Path(video_path).unlink()
+            logger.info(f"Cleaned up uploaded file: {video_path}")
+        except Exception as e:
+            logger.warning(f"Could not remove temporary file {video_path}: {e}")
+
+
+def background_process_video(video_path, content_hash=None, ticket=None, job=None):
     """Background processor for videos with improved status handling"""
     global processing_status
-    progress_callback = ProgressCallback()
+    job = job or event_hub.new_job()
+    progress_callback = ProgressCallback(job)
 
     try:
         with status_lock:
+            processing_status["job_id"] = job.job_id
             processing_status["is_processing"] = True
             processing_status["completed"] = False
             processing_status["error"] = None
@@ -105,59 +212,84 @@ def background_process_video(video_path):
             # Store the actual output directory path
             output_dir = str(OUTPUT_FOLDER / Path(video_path).stem)
             processing_status["output_dir"] = output_dir
+        job.publish("start", {"video": Path(video_path).name, "output_dir": output_dir})
 
         # Check if file exists
         if not Path(video_path).exists():
             raise FileNotFoundError(f"Video file not found: {video_path}")
 
+        # Serve a repeated clip from the result cache instead of re-extracting
+        if content_hash is None:
+            content_hash = hash_file(video_path)
+        cache_key = extraction_key(content_hash, extraction_params(config))
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            with status_lock:
+                processing_status["progress"] = 100
+                processing_status["completed"] = True
+                processing_status["end_time"] = time.time()
+                processing_status["frames"] = cached["frames"]
+                processing_status["output_dir"] = str(
+                    OUTPUT_FOLDER / cached["output_dir"]
+                )
+            retention.touch(cached["output_dir"])
+            logger.info(
+                f"Result cache hit for {Path(video_path).name}: "
+                f"{len(cached['frames'])} frames in {cached['output_dir']}"
+            )
+            job.publish("frames", {"frames": cached["frames"]})
+            job.publish(
+                "complete",
+                {"frame_count": len(cached["frames"]), "cached": True},
+            )
+            cleanup_upload(video_path)
+            return
+
         # Process video using the enhanced function
-        frame_paths = extract_frames_for_web(
-            input_path=video_path,
-            output_dir=output_dir,
+        result, frames = extract_video_for_web(
+            video_path,
+            output_dir=OUTPUT_FOLDER,
             progress_callback=progress_callback,
             quality=config.quality,
             output_format=config.output_format,
+            threads=ticket.cpu_threads if ticket else config.threads,
+            ffmpeg_nice=config.ffmpeg_nice,
+            profile_dir=config.profile_dir,
         )
 
+        # A failed run leaves any previous output of the same name in place;
+        # it must not be reported (or cached) as this upload's frames
+        if result.status != SUCCESS:
+            raise RuntimeError(result.error or f"Extraction {result.status}")
+
         # Update status with results
         with status_lock:
             processing_status["progress"] = 100
             processing_status["completed"] = True
             processing_status["end_time"] = time.time()
+            processing_status["frames"] = frames
+            logger.info(f"Processing completed. Found {len(frames)} frames.")
 
-            # Fix: Ensure frame paths exist and are properly formatted
-            if frame_paths and isinstance(frame_paths, list):
-                processing_status["frames"] = frame_paths
-            else:
-                # If no frames were returned, check if they exist in the output directory
-                output_path = Path(output_dir)
-                if output_path.exists():
-                    frames = list(output_path.glob(f"*.{config.output_format}"))
-                    processing_status["frames"] = [
-                        str(f.relative_to(OUTPUT_FOLDER)) for f in frames
-                    ]
-                else:
-                    processing_status["frames"] = []
+        if frames[progress_callback.published :]:
+            job.publish("frames", {"frames": frames[progress_callback.published :]})
+        job.publish("complete", {"frame_count": len(frames), "cached": False})
 
-            logger.info(
-                f"Processing completed. Found {len(processing_status['frames'])} frames."
-            )
+        if frames:
+            result_cache.put(cache_key, result.output_dir, frames)
 
         # Clean up uploaded file if it's in our upload folder
-        if str(video_path).startswith(str(UPLOAD_FOLDER)):
-            try:
-                Path(video_path).unlink()
-                logger.info(f"Cleaned up uploaded file: {video_path}")
-            except Exception as e:
-                logger.warning(f"Could not remove temporary file {video_path}: {e}")
+        cleanup_upload(video_path)
 
     except Exception as e:
         with status_lock:
             processing_status["error"] = str(e)
+        job.publish("error", {"error": str(e)})
         logger.error(f"Error in background processing: {e}")
     finally:
         with status_lock:
             processing_status["is_processing"] = False
+        if ticket is not None:
+            governor.release(ticket)
 
 
 @app.route("/upload", methods=["POST"])
@@ -167,6 +299,20 @@ def upload_video():
         if processing_status["is_processing"]:
             return jsonify({"error": "Processing is already in progress"}), 409
 
+    # Reserve disk for the upload before the request body is read
+    try:
+        upload_ticket = governor.acquire(
+            "upload", temp_bytes=request.content_length or 0
+        )
+    except AdmissionRejected as e:
+        return busy_response(e)
+    try:
+        return _receive_upload()
+    finally:
+        governor.release(upload_ticket)
+
+
+def _receive_upload():
     if "video" not in request.files:
         return jsonify({"error": "No video file provided"}), 400
 
@@ -175,18 +321,29 @@ def upload_video():
     if video_file.filename == "":
         return jsonify({"error": "No video file selected"}), 400
 
-    # Save the uploaded file
+    # Save the uploaded file, hashing it on the way for the result cache
     filename = Path(video_file.filename).name
     file_path = UPLOAD_FOLDER / filename
-    video_file.save(file_path)
+    hasher = new_content_hasher()
+    with open(file_path, "wb") as f:
+        while True:
+            chunk = video_file.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            f.write(chunk)
 
-    # Define output directory based on video name
-    output_dir = OUTPUT_FOLDER / file_path.stem
-    output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        job_ticket = governor.acquire("extract", cpu_threads=config.threads)
+    except AdmissionRejected as e:
+        cleanup_upload(file_path)
+        return busy_response(e)
 
     # Start processing in background
+    job = event_hub.new_job()
     processing_thread = threading.Thread(
-        target=background_process_video, args=(file_path,)
+        target=background_process_video,
+        args=(file_path, hasher.hexdigest(), job_ticket, job),
     )
     processing_thread.daemon = True
     processing_thread.start()
@@ -195,6 +352,8 @@ def upload_video():
         {
             "message": "Video uploaded and processing started",
             "status_endpoint": "/status",
+            "events_endpoint": f"/events?job_id={job.job_id}",
+            "job_id": job.job_id,
             "filename": filename,
         }
     )
@@ -216,9 +375,15 @@ def process_videos():
     if not Path(video_path).exists():
         return jsonify({"error": "Video file not found at specified path"}), 404
 
+    try:
+        job_ticket = governor.acquire("extract", cpu_threads=config.threads)
+    except AdmissionRejected as e:
+        return busy_response(e)
+
     # Start processing in background
+    job = event_hub.new_job()
     processing_thread = threading.Thread(
-        target=background_process_video, args=(video_path,)
+        target=background_process_video, args=(video_path, None, job_ticket, job)
     )
     processing_thread.daemon = True
     processing_thread.start()
@@ -227,6 +392,8 @@ def process_videos():
         {
             "message": "Processing started",
             "status_endpoint": "/status",
+            "events_endpoint": f"/events?job_id={job.job_id}",
+            "job_id": job.job_id,
             "filename": Path(video_path).name,
         }
     )
@@ -244,6 +411,79 @@ def get_status():
         elif result.get("start_time") and result.get("end_time"):
             result["elapsed_seconds"] = int(result["end_time"] - result["start_time"])
 
+    result["load"] = governor.snapshot()
+
+    return jsonify(result)
+
+
+def _event_cursor():
+    """Last event id the client has seen: Last-Event-ID header or ?since="""
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("since", 0)
+    try:
+        return int(last_id)
+    except ValueError:
+        return 0
+
+
+@app.route("/events", methods=["GET"])
+def stream_events():
+    """Server-Sent Events stream of progress deltas for one job"""
+    job = event_hub.get(request.args.get("job_id"))
+    if job is None:
+        return jsonify({"error": "No such job"}), 404
+    last_id = _event_cursor()
+
+    def generate():
+        nonlocal last_id
+        yield "retry: 2000\n\n"
+        while True:
+            events, missed = job.wait(last_id, EVENT_KEEPALIVE_SECONDS)
+            if missed:
+                # Fell behind the ring buffer: resend the full state once
+                data = json.dumps(job.snapshot())
+                yield f"event: snapshot\ndata: {data}\n\n"
+            if not events:
+                if job.finished:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                last_id = event["id"]
+                data = json.dumps(event["data"])
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+            if job.finished and last_id >= job.last_id:
+                return
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/events/poll", methods=["GET"])
+def poll_events():
+    """Long-poll fallback for clients without EventSource support"""
+    job = event_hub.get(request.args.get("job_id"))
+    if job is None:
+        return jsonify({"error": "No such job"}), 404
+    try:
+        timeout = float(request.args.get("timeout", 25))
+    except ValueError:
+        timeout = math.nan
+    if not math.isfinite(timeout):
+        return jsonify({"error": "timeout must be a number of seconds"}), 400
+    timeout = min(max(timeout, 0.0), LONG_POLL_MAX_SECONDS)
+    events, missed = job.wait(_event_cursor(), timeout)
+
+    result = {
+        "job_id": job.job_id,
+        "events": events,
+        "last_id": events[-1]["id"] if events else _event_cursor(),
+        "finished": job.finished,
+    }
+    if missed:
+        result["snapshot"] = job.snapshot()
     return jsonify(result)
 
 
@@ -256,16 +496,26 @@ def list_frames():
     video_path = request.args.get("video_path")
     result = []
 
+    # Frames of the running job live in a staging directory until it commits
+    with status_lock:
+        running = processing_status["is_processing"] and processing_status["output_dir"]
+        running_dir = Path(processing_status["output_dir"]) if running else None
+        running_frames = list(processing_status["frames"]) if running else []
+
     # Find all output directories
-    for video_dir in OUTPUT_FOLDER.glob("*"):
-        if not video_dir.is_dir():
+    for video_dir in sorted(OUTPUT_FOLDER.glob("*")):
+        # Skip staging and bookkeeping entries (".<name>.staging", ".result_cache.json")
+        if not video_dir.is_dir() or video_dir.name.startswith("."):
+            continue
+
+        if running_dir is not None and video_dir.name == running_dir.name:
             continue
 
         # Filter by video name if specified
         if video_path and video_dir.name != Path(video_path).stem:
             continue
 
-        frames = list(video_dir.glob(f"*.{config.output_format}"))
+        frames = list(video_dir.glob(frame_glob(config.output_format)))
         frames.sort()  # Sort frames for consistent order
 
         if frames:
@@ -278,12 +528,42 @@ def list_frames():
                 }
             )
 
+    if running_dir is not None and (
+        not video_path or running_dir.name == Path(video_path).stem
+    ):
+        result.append(
+            {
+                "video_name": running_dir.name,
+                "path": running_dir.name,
+                "frame_count": len(running_frames),
+                "frames": running_frames,
+                "in_progress": True,
+            }
+        )
+
     return jsonify(result)
 
 
 @app.route("/frames/<path:frame_path>")
 def serve_frame(frame_path):
     """Serve a specific frame"""
+    final_path = OUTPUT_FOLDER / frame_path
+    retention.touch(Path(frame_path).parts[0])
+    with status_lock:
+        running_frame = (
+            processing_status["is_processing"]
+            and frame_path in processing_status["frames"]
+        )
+    # Published while extraction is still running: serve it from staging. A frame
+    # of the running job comes from there even when an older output of the same
+    # name still has a file at the final path
+    if running_frame or not final_path.exists():
+        staging_dir = staging_dir_for(final_path.parent)
+        if (
+            staging_dir.resolve().is_relative_to(OUTPUT_FOLDER.resolve())
+            and (staging_dir / final_path.name).exists()
+        ):
+            return send_from_directory(str(staging_dir.resolve()), final_path.name)
     return send_from_directory(str(OUTPUT_FOLDER), frame_path)
 
 
@@ -300,21 +580,43 @@ def download_frames():
 
     if not video_output_dir.exists():
         return jsonify({"error": f"No frames found for {video_name}"}), 404
+    retention.touch(video_name)
+
+    frames = list(video_output_dir.glob(frame_glob(config.output_format)))
+    try:
+        # Only disk is reserved: the CPU budget is the FFmpeg pool, which a running
+        # extraction takes whole, and a download of finished frames must not wait on it
+        zip_ticket = governor.acquire(
+            "zip",
+            temp_bytes=sum(frame.stat().st_size for frame in frames),
+            wait=ZIP_ADMISSION_WAIT,
+        )
+    except AdmissionRejected as e:
+        return busy_response(e)
 
     # Create a temporary zip file
-    temp_dir = tempfile.mkdtemp()
+    temp_dir = tempfile.mkdtemp(dir=ZIP_FOLDER)
     zip_path = Path(temp_dir) / f"{video_name}_frames.zip"
 
-    with zipfile.ZipFile(zip_path, "w") as zipf:
-        for frame in video_output_dir.glob(f"*.{config.output_format}"):
-            zipf.write(frame, arcname=frame.name)
+    try:
+        with zipfile.ZipFile(zip_path, "w") as zipf:
+            for frame in frames:
+                zipf.write(frame, arcname=frame.name)
+    finally:
+        governor.release(zip_ticket)
 
-    return send_file(
+    response = send_file(
         zip_path,
         mimetype="application/zip",
         as_attachment=True,
         download_name=f"{video_name}_frames.zip",
     )
+    # Remove the archive once it is sent; with direct passthrough the WSGI
+    # server would bypass close() and its callbacks. Aborted downloads are
+    # caught by the retention sweep instead.
+    response.direct_passthrough = False
+    response.call_on_close(lambda: shutil.rmtree(temp_dir, ignore_errors=True))
+    return response
 
 
 if __name__ == "__main__":